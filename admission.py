@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Deadline-Aware Admission Control
+================================
+
+Bounded admission queue plus graceful degradation for the Reranker serving
+path. Under overload, it is better to answer on time with less work than to
+score every byte and miss the client's deadline.
+
+Each request carries a deadline (an absolute time.monotonic() value, see
+deadline_in()). The controller:
+
+1. Sheds the request immediately if the admission queue is full
+2. Waits for a free execution slot, shedding if the deadline passes first
+3. Estimates the scoring cost of each step of the degradation ladder and
+   runs the first step that fits in the remaining time, or sheds if none does
+
+The default ladder:
+    full           - No degradation (8192-token pairs)
+    truncate_2048  - Documents truncated to 2048 tokens per pair
+    truncate_512   - Documents truncated to 512 tokens per pair
+    candidates_20  - 512 tokens and only the first 20 candidates scored;
+                     the rest keep their input order after the scored ones
+
+Costs are estimated as batch size x padded length (characters / 4 per
+token), multiplied by a seconds-per-token rate that is learned from observed
+requests with an exponential moving average.
+
+Shed requests are never measured, so a too-pessimistic rate (a slow cold
+start, or an initial guess above what the host does) would otherwise shed
+forever. Each deadline shed therefore decays the rate by `shed_decay`, down
+to `min_seconds_per_token`. Under sustained shedding, a request is soon
+admitted and measured again, and the rate settles on the real cost.
+
+Shed requests raise OverloadedError. Degradation counts are available from
+report() and as reranker_degradations_total{step=...} in metrics.py.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import metrics
+
+DEFAULT_LADDER = (
+    {"name": "full"},
+    {"name": "truncate_2048", "max_length": 2048},
+    {"name": "truncate_512", "max_length": 512},
+    {"name": "candidates_20", "max_length": 512, "max_candidates": 20},
+)
+
+CHARS_PER_TOKEN = 4
+TEMPLATE_TOKENS = 64
+
+DEGRADATIONS = metrics.REGISTRY.counter(
+    "reranker_degradations_total", "Requests by admission outcome (ladder step or shed)", ["step"])
+
+
+class OverloadedError(RuntimeError):
+    """Raised when a request is shed by admission control"""
+
+    def __init__(self, reason):
+        super().__init__(f"Request shed: {reason}")
+        self.reason = reason
+
+
+def deadline_in(seconds):
+    """Absolute deadline `seconds` from now, for use with Reranker.rerank(deadline=...)"""
+    return time.monotonic() + seconds
+
+
+def estimate_tokens(text):
+    """Cheap token estimate that avoids running the tokenizer"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+class AdmissionController:
+    """Bounded admission queue with deadline-driven degradation"""
+
+    def __init__(self, max_concurrency=1, max_queue=16, ladder=DEFAULT_LADDER,
+                 max_length=8192, initial_seconds_per_token=5e-4, smoothing=0.2,
+                 shed_decay=0.1, min_seconds_per_token=1e-6):
+        """
+        Args:
+            max_concurrency: Requests scored at the same time
+            max_queue: Requests allowed to wait for a slot before new ones are shed
+            ladder: Degradation steps, tried in order (see DEFAULT_LADDER)
+            max_length: Token limit of the undegraded path
+            initial_seconds_per_token: Cost estimate until requests have been observed
+            smoothing: EWMA weight given to each new observation
+            shed_decay: Fraction the rate estimate drops by on each deadline shed
+            min_seconds_per_token: Floor for the decayed rate estimate
+        """
+        self.max_queue = max_queue
+        self.ladder = tuple(ladder)
+        self.max_length = max_length
+        self.smoothing = smoothing
+        self.shed_decay = shed_decay
+        self.min_seconds_per_token = min_seconds_per_token
+        self.seconds_per_token = initial_seconds_per_token
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self._waiting = 0
+        self._counts = {step["name"]: 0 for step in self.ladder}
+        self._counts["shed"] = 0
+
+    def estimate_seconds(self, token_counts, step):
+        """Estimated scoring time of a step for the given per-document token counts"""
+        max_length = step.get("max_length", self.max_length)
+        counts = token_counts[:step["max_candidates"]] if "max_candidates" in step else token_counts
+        if not counts:
+            return 0.0
+        padded_length = min(max(counts) + TEMPLATE_TOKENS, max_length)
+        return len(counts) * padded_length * self.seconds_per_token
+
+    def effective_tokens(self, token_counts, step):
+        """Padded token volume actually processed by a step"""
+        max_length = step.get("max_length", self.max_length)
+        counts = token_counts[:step["max_candidates"]] if "max_candidates" in step else token_counts
+        return len(counts) * min(max(counts) + TEMPLATE_TOKENS, max_length) if counts else 0
+
+    def observe(self, seconds, tokens):
+        """Update the seconds-per-token estimate from a completed request"""
+        if tokens <= 0:
+            return
+        with self._lock:
+            rate = seconds / tokens
+            self.seconds_per_token += self.smoothing * (rate - self.seconds_per_token)
+
+    def _record(self, name):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+        DEGRADATIONS.inc(step=name)
+
+    def _shed(self, reason):
+        self._record("shed")
+        raise OverloadedError(reason)
+
+    @contextmanager
+    def admit(self, documents, deadline=None):
+        """Admit a request, yielding the ladder step to run
+
+        Raises OverloadedError if the request is shed. The caller should apply
+        the step's max_length / max_candidates and report the actual cost via
+        observe() (Reranker does both).
+        """
+        with self._lock:
+            if self._waiting >= self.max_queue:
+                queue_full = True
+            else:
+                queue_full = False
+                self._waiting += 1
+                metrics.QUEUE_DEPTH.set(self._waiting, queue="admission")
+        if queue_full:
+            self._shed("admission queue full")
+
+        try:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            acquired = self._slots.acquire(timeout=timeout)
+        finally:
+            with self._lock:
+                self._waiting -= 1
+                metrics.QUEUE_DEPTH.set(self._waiting, queue="admission")
+        if not acquired:
+            self._shed("deadline expired while queued")
+
+        try:
+            step = self.ladder[0]
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                token_counts = [estimate_tokens(doc) for doc in documents]
+                for candidate in self.ladder:
+                    if self.estimate_seconds(token_counts, candidate) <= remaining:
+                        step = candidate
+                        break
+                else:
+                    # Unmeasured sheds cannot correct the estimate, so decay it
+                    with self._lock:
+                        self.seconds_per_token = max(self.min_seconds_per_token,
+                                                     self.seconds_per_token * (1 - self.shed_decay))
+                    self._shed(f"cannot meet deadline ({remaining * 1000:.0f} ms left)")
+            self._record(step["name"])
+            yield step
+        finally:
+            self._slots.release()
+
+    def report(self):
+        """Counts and fractions of requests per ladder step (and shed)"""
+        with self._lock:
+            counts = dict(self._counts)
+            waiting = self._waiting
+            rate = self.seconds_per_token
+        total = sum(counts.values())
+        return {
+            "total": total,
+            "counts": counts,
+            "fractions": {name: (count / total if total else 0.0) for name, count in counts.items()},
+            "queue_depth": waiting,
+            "seconds_per_token": rate
+        }
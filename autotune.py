@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+CPU Execution Auto-Tuner
+========================
+
+Sweeps torch thread count, batch size and worker process count on a
+representative scoring workload and saves the best configuration to a profile
+file. "Best" means the highest throughput (pairs/s) whose p95 batch latency
+meets --latency-slo-ms. If no configuration meets the SLO, the one with the
+lowest p95 latency is used.
+
+The Transformers scorer loads the profile at startup: the thread count is
+applied when the model is loaded, and TransformersBackend uses the batch
+size. The process count is recorded as the recommended number of worker
+processes per host, since the scorer itself runs in a single process.
+
+Host topology (physical cores, SMT, NUMA nodes) is detected from /proc and
+/sys on Linux and stored with the profile. A profile tuned on a different
+host is flagged by show_config.py.
+
+Usage:
+    python autotune.py --latency-slo-ms 500
+    python autotune.py --threads 1,2,4 --batch-sizes 4,16 --processes 1,2 --doc-words 256
+
+Environment Variables:
+    RERANKER_PROFILE: Profile path (default: tuned_profile.json)
+"""
+
+import argparse
+import glob
+import json
+import math
+import multiprocessing
+import os
+import platform
+import sys
+import threading
+import time
+
+from metrics import percentile
+
+PROFILE_FILE = "tuned_profile.json"
+
+
+def get_profile_path():
+    """Get profile path from environment variable or use default"""
+    return os.getenv("RERANKER_PROFILE", PROFILE_FILE)
+
+
+def load_profile(path=None):
+    """Load the tuned profile, or None if there is none"""
+    path = path or get_profile_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"⚠️  Warning: Could not load tuned profile {path}: {e}")
+        return None
+
+
+def apply_profile(profile):
+    """Apply process-wide settings from a profile (torch thread count)"""
+    if not profile or not profile.get("threads"):
+        return
+    import torch
+    torch.set_num_threads(int(profile["threads"]))
+
+
+_profile_lock = threading.Lock()
+_profile_applied = False
+
+
+def apply_profile_once(profile):
+    """apply_profile() at startup only; later backends leave process settings alone"""
+    global _profile_applied
+    with _profile_lock:
+        if _profile_applied or not profile:
+            return
+        apply_profile(profile)
+        _profile_applied = True
+
+
+def detect_host():
+    """Describe the CPU topology relevant to tuning"""
+    logical = os.cpu_count() or 1
+    physical = None
+    try:
+        cores = set()
+        physical_id = "0"
+        with open("/proc/cpuinfo", "r") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                key, value = key.strip(), value.strip()
+                if key == "physical id":
+                    physical_id = value
+                elif key == "core id":
+                    cores.add((physical_id, value))
+        physical = len(cores) or None
+    except OSError:
+        pass
+    physical = physical or logical
+
+    numa_nodes = len(glob.glob("/sys/devices/system/node/node[0-9]*")) or 1
+    try:
+        affinity = len(os.sched_getaffinity(0))
+    except AttributeError:
+        affinity = logical
+
+    return {
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "logical_cpus": logical,
+        "physical_cores": physical,
+        "smt": logical > physical,
+        "numa_nodes": numa_nodes,
+        "usable_cpus": affinity
+    }
+
+
+def default_thread_candidates(host):
+    """Powers of two below the usable CPU count, plus physical and usable counts"""
+    limit = host["usable_cpus"]
+    candidates = {1, min(host["physical_cores"], limit), limit}
+    n = 2
+    while n < limit:
+        candidates.add(n)
+        n *= 2
+    return sorted(candidates)
+
+
+def build_pairs(doc_words, count):
+    """Representative pairs: corpus documents plus synthetic documents of doc_words words"""
+    from corpus import load_test_cases
+    from perf_gate import synthetic_cases
+    from reranker import format_instruction
+
+    pairs = [format_instruction(tc.get("instruction"), tc["query"], doc)
+             for tc in load_test_cases() for doc in tc["documents"]]
+    synthetic = synthetic_cases(max(1, math.ceil(count / 8)), 8, doc_words)
+    pairs += [format_instruction(None, tc["query"], doc) for tc in synthetic for doc in tc["documents"]]
+    return (pairs * math.ceil(count / max(len(pairs), 1)))[:count]
+
+
+def _batches(pairs, batch_size):
+    return [pairs[i:i + batch_size] for i in range(0, len(pairs), batch_size)]
+
+
+# Per-process state for multi-process measurements
+_WORKER_BACKEND = None
+
+
+def _worker_init(model_id, threads):
+    global _WORKER_BACKEND
+    import torch
+    from reranker import TransformersBackend
+
+    torch.set_num_threads(threads)
+    _WORKER_BACKEND = TransformersBackend(model_id=model_id, use_profile=False)
+
+
+def _worker_score(batches):
+    latencies = []
+    for batch in batches:
+        start = time.perf_counter()
+        _WORKER_BACKEND.score_pairs(batch)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def measure_in_process(backend, pairs, threads, batch_size):
+    """Throughput and batch latencies for one configuration in this process"""
+    import torch
+
+    torch.set_num_threads(threads)
+    backend.batch_size = None
+    batches = _batches(pairs, batch_size)
+    backend.score_pairs(batches[0])
+
+    latencies = []
+    start = time.perf_counter()
+    for batch in batches:
+        t0 = time.perf_counter()
+        backend.score_pairs(batch)
+        latencies.append(time.perf_counter() - t0)
+    return len(pairs) / (time.perf_counter() - start), latencies
+
+
+def measure_processes(model_id, pairs, processes, threads, batch_size):
+    """Throughput and batch latencies for one configuration across worker processes"""
+    batches = _batches(pairs, batch_size)
+    shares = [batches[i::processes] for i in range(processes)]
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(processes, initializer=_worker_init, initargs=(model_id, threads)) as pool:
+        # Warm up every worker before timing
+        pool.map(_worker_score, [[batches[0]]] * processes, chunksize=1)
+        start = time.perf_counter()
+        results = pool.map(_worker_score, shares, chunksize=1)
+        elapsed = time.perf_counter() - start
+    return len(pairs) / elapsed, [latency for share in results for latency in share]
+
+
+def pick_best(results, latency_slo_ms):
+    """Highest throughput meeting the SLO, else the lowest-latency configuration"""
+    within_slo = [r for r in results if r["p95_latency_ms"] <= latency_slo_ms]
+    if within_slo:
+        return max(within_slo, key=lambda r: r["throughput"]), True
+    return min(results, key=lambda r: r["p95_latency_ms"]), False
+
+
+def parse_ints(value):
+    """argparse type for comma-separated integers ("1,2,4")"""
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def main():
+    from reranker import DEFAULT_MODEL_ID, TransformersBackend
+
+    parser = argparse.ArgumentParser(description="Auto-tune CPU execution for the Transformers scorer")
+    parser.add_argument("--model", default=DEFAULT_MODEL_ID, help="Model id or path")
+    parser.add_argument("--threads", type=parse_ints, help="Thread counts to try (default: derived from host)")
+    parser.add_argument("--batch-sizes", type=parse_ints, default=[1, 4, 8, 16, 32])
+    parser.add_argument("--processes", type=parse_ints, default=[1, 2], help="Worker process counts to try")
+    parser.add_argument("--latency-slo-ms", type=float, default=1000.0, help="p95 batch latency SLO")
+    parser.add_argument("--doc-words", type=int, default=256, help="Words per synthetic document")
+    parser.add_argument("--pairs", type=int, default=64, help="Pairs scored per configuration")
+    parser.add_argument("--output", default=get_profile_path())
+    args = parser.parse_args()
+
+    host = detect_host()
+    print("🎛️  CPU Auto-Tuner")
+    print("=" * 50)
+    print(f"🖥️  {host['logical_cpus']} logical CPUs, {host['physical_cores']} physical cores, "
+          f"SMT {'on' if host['smt'] else 'off'}, {host['numa_nodes']} NUMA node(s)")
+
+    threads = args.threads or default_thread_candidates(host)
+    pairs = build_pairs(args.doc_words, args.pairs)
+    backend = TransformersBackend(model_id=args.model, use_profile=False)
+
+    results = []
+    for processes in args.processes:
+        for thread_count in threads:
+            if processes * thread_count > host["usable_cpus"]:
+                continue
+            for batch_size in args.batch_sizes:
+                try:
+                    if processes == 1:
+                        throughput, latencies = measure_in_process(backend, pairs, thread_count, batch_size)
+                    else:
+                        throughput, latencies = measure_processes(args.model, pairs, processes,
+                                                                  thread_count, batch_size)
+                except Exception as e:
+                    print(f"⚠️  processes={processes} threads={thread_count} batch={batch_size} failed: {e}")
+                    continue
+                result = {
+                    "processes": processes,
+                    "threads": thread_count,
+                    "batch_size": batch_size,
+                    "throughput": throughput,
+                    "p95_latency_ms": percentile(latencies, 95) * 1000
+                }
+                results.append(result)
+                print(f"  processes={processes} threads={thread_count:<3} batch={batch_size:<3} "
+                      f"{throughput:8.2f} pairs/s  p95 {result['p95_latency_ms']:8.1f} ms")
+
+    if not results:
+        print("❌ No configuration could be measured")
+        return 1
+
+    best, meets_slo = pick_best(results, args.latency_slo_ms)
+    profile = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "model_id": args.model,
+        "host": host,
+        "threads": best["threads"],
+        "batch_size": best["batch_size"],
+        "processes": best["processes"],
+        "throughput": best["throughput"],
+        "p95_latency_ms": best["p95_latency_ms"],
+        "latency_slo_ms": args.latency_slo_ms,
+        "meets_slo": meets_slo,
+        "doc_words": args.doc_words,
+        "results": results
+    }
+    with open(args.output, "w") as f:
+        json.dump(profile, f, indent=2)
+
+    if not meets_slo:
+        print(f"⚠️  No configuration met the {args.latency_slo_ms:.0f} ms SLO; using the lowest-latency one")
+    print(f"\n✅ Best: processes={best['processes']} threads={best['threads']} batch={best['batch_size']} "
+          f"({best['throughput']:.2f} pairs/s, p95 {best['p95_latency_ms']:.1f} ms)")
+    print(f"💾 Profile saved to: {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
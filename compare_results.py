@@ -14,6 +14,9 @@ with logit probabilities.
 Usage:
     python compare_results.py
 
+If results are missing, both backends are run concurrently in-process
+via orchestrator.py.
+
 Results:
     - Saves detailed comparison to results/comparison_results.json
     - Shows ranking matches and score similarities
@@ -22,65 +25,9 @@ Results:
 
 import json
 import os
-import glob
-import subprocess
-import sys
 
-def load_test_cases():
-    """Load test cases from JSON files in tests/ directory"""
-    test_cases = []
-    test_files = glob.glob("tests/test_*.json")
-    
-    for test_file in sorted(test_files):
-        try:
-            with open(test_file, 'r') as f:
-                test_data = json.load(f)
-                
-            # Extract test case name from filename
-            test_name = os.path.splitext(os.path.basename(test_file))[0]
-            
-            # Create test case structure
-            test_case = {
-                "name": test_name,
-                "file": test_file,
-                "query": test_data.get("query", ""),
-                "documents": test_data.get("documents", [])
-            }
-            
-            # Add optional parameters if present
-            if "instruction" in test_data:
-                test_case["instruction"] = test_data["instruction"]
-            if "top_n" in test_data:
-                test_case["top_n"] = test_data["top_n"]
-            if "model" in test_data:
-                test_case["model"] = test_data["model"]
-                
-            test_cases.append(test_case)
-            
-        except Exception as e:
-            print(f"⚠️  Warning: Could not load {test_file}: {e}")
-    
-    return test_cases
-
-def run_tests():
-    """Run both test scripts"""
-    print("🚀 Running Ollama tests...")
-    try:
-        subprocess.run([sys.executable, "test_ollama.py"], check=True)
-        print("✅ Ollama tests completed")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Ollama tests failed: {e}")
-        return False
-    
-    print("\n🚀 Running Official tests...")
-    try:
-        subprocess.run([sys.executable, "test_official.py"], check=True)
-        print("✅ Official tests completed")
-    except subprocess.CalledProcessError as e:
-        print(f"❌ Official tests failed: {e}")
-        return False
-    
-    return True
+from corpus import load_test_cases
+from rerank_result import json_default
 
 def load_results():
     """Load results from JSON files"""
@@ -155,15 +102,16 @@ def main():
     official_exists = os.path.exists("results/official_results.json")
     
     if not ollama_exists or not official_exists:
-        print("📋 Running tests first...")
-        if not run_tests():
-            print("❌ Failed to run tests. Exiting.")
+        print("📋 Running tests first (both backends in-process)...")
+        from orchestrator import run_tests_in_process
+        try:
+            ollama_results, official_results = run_tests_in_process()
+        except Exception as e:
+            print(f"❌ Failed to run tests: {e}")
             return
     else:
         print("📋 Using existing results...")
-    
-    # Load results
-    ollama_results, official_results = load_results()
+        ollama_results, official_results = load_results()
     
     if not ollama_results or not official_results:
         print("❌ No results found. Please run tests first.")
@@ -218,7 +166,7 @@ def main():
     # Save comparison results
     results_file = "results/comparison_results.json"
     with open(results_file, "w") as f:
-        json.dump(comparison_results, f, indent=2)
+        json.dump(comparison_results, f, indent=2, default=json_default)
     
     print(f"\n💾 Comparison results saved to: {results_file}")
     
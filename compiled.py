@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Compiled Scoring with Static Shape Buckets
+==========================================
+
+Optional graph-compiled execution for the warm scoring path. Eager mode pays
+Python dispatch overhead on every forward call. Compiling for arbitrary
+shapes would recompile all the time, so inputs are padded up to the nearest
+(batch, sequence-length) bucket from a fixed set. Every bucket is compiled
+once at startup, and inputs larger than the biggest bucket run eagerly.
+
+Modes:
+    compile - torch.compile(dynamic=False), one specialization per bucket
+    trace   - torch.jit.trace, one traced graph per bucket
+
+BucketedModel is a drop-in replacement for the model in process_inputs() /
+compute_logits(). It only computes logits for the last position. Position
+ids are shifted so that real tokens keep the positions they would have in
+eager mode, so the extra left padding does not change scores beyond
+numerical noise.
+
+Because startup cost and speedup depend on the deployment, both are
+reported. Compare them per host before enabling:
+
+    python compiled.py --mode compile --batch-buckets 1,4,8 --seq-buckets 128,256,512
+
+Usage from code:
+    backend = TransformersBackend(compile_mode="compile", shape_buckets=((1, 4, 8), (128, 512)))
+    print(backend.model_info["model"].startup_report())
+"""
+
+import argparse
+import bisect
+import sys
+import time
+from types import SimpleNamespace
+
+DEFAULT_BATCH_BUCKETS = (1, 4, 8, 16, 32)
+DEFAULT_SEQ_BUCKETS = (128, 256, 512, 1024, 2048)
+MODES = ("compile", "trace")
+
+
+def _last_logits_module(model):
+    """nn.Module computing last-position logits from (input_ids, attention_mask, position_ids)"""
+    import torch
+
+    class LastLogits(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, position_ids):
+            outputs = self.model(input_ids=input_ids, attention_mask=attention_mask,
+                                 position_ids=position_ids, use_cache=False, logits_to_keep=1)
+            return outputs.logits[:, -1, :]
+
+    return LastLogits().eval()
+
+
+class BucketedModel:
+    """Model wrapper running inputs through precompiled static-shape buckets"""
+
+    def __init__(self, model, pad_token_id, batch_buckets=DEFAULT_BATCH_BUCKETS,
+                 seq_buckets=DEFAULT_SEQ_BUCKETS, mode="compile"):
+        import torch
+
+        if mode not in MODES:
+            raise ValueError(f"Unknown compile mode '{mode}', expected one of {MODES}")
+        self.model = model
+        self.device = model.device
+        self.pad_token_id = pad_token_id if pad_token_id is not None else 0
+        self.batch_buckets = tuple(sorted(batch_buckets))
+        self.seq_buckets = tuple(sorted(seq_buckets))
+        self.mode = mode
+        self._module = _last_logits_module(model)
+        self._graphs = {}
+        self.compile_seconds = {}
+        self.failed = {}
+        self.calls = {"compiled": 0, "eager": 0}
+
+        if mode == "compile":
+            # One specialization per bucket must fit in dynamo's cache
+            buckets = len(self.batch_buckets) * len(self.seq_buckets)
+            for option in ("cache_size_limit", "recompile_limit"):
+                if hasattr(torch._dynamo.config, option):
+                    setattr(torch._dynamo.config, option, max(getattr(torch._dynamo.config, option), buckets + 8))
+            self._compiled = torch.compile(self._module, dynamic=False)
+
+    def bucket_for(self, batch, seq_len):
+        """Smallest bucket fitting the shape, or None for outliers"""
+        b = bisect.bisect_left(self.batch_buckets, batch)
+        s = bisect.bisect_left(self.seq_buckets, seq_len)
+        if b == len(self.batch_buckets) or s == len(self.seq_buckets):
+            return None
+        return self.batch_buckets[b], self.seq_buckets[s]
+
+    def _example(self, batch, seq_len):
+        import torch
+
+        input_ids = torch.full((batch, seq_len), self.pad_token_id, dtype=torch.long, device=self.device)
+        attention_mask = torch.ones((batch, seq_len), dtype=torch.long, device=self.device)
+        position_ids = torch.arange(seq_len, device=self.device).unsqueeze(0).expand(batch, -1)
+        return input_ids, attention_mask, position_ids
+
+    def precompile(self, verbose=False):
+        """Compile and warm every bucket, recording the time each one took"""
+        import torch
+
+        for batch in self.batch_buckets:
+            for seq_len in self.seq_buckets:
+                start = time.perf_counter()
+                try:
+                    example = self._example(batch, seq_len)
+                    with torch.inference_mode():
+                        if self.mode == "trace":
+                            graph = torch.jit.trace(self._module, example, check_trace=False, strict=False)
+                            graph = torch.jit.freeze(graph) if hasattr(torch.jit, "freeze") else graph
+                        else:
+                            graph = self._compiled
+                        graph(*example)
+                    self._graphs[(batch, seq_len)] = graph
+                    self.compile_seconds[(batch, seq_len)] = time.perf_counter() - start
+                except Exception as e:
+                    # This bucket falls back to eager
+                    self.failed[(batch, seq_len)] = str(e)
+                if verbose:
+                    status = "failed" if (batch, seq_len) in self.failed else f"{time.perf_counter() - start:.2f}s"
+                    print(f"  bucket batch={batch:<3} seq={seq_len:<5} {status}")
+        return self
+
+    def _pad_to_bucket(self, input_ids, attention_mask, bucket):
+        """Left-pad to the bucket shape, keeping eager-mode positions for real tokens"""
+        import torch
+
+        batch, seq_len = input_ids.shape
+        bucket_batch, bucket_seq = bucket
+        pad_seq = bucket_seq - seq_len
+
+        ids = torch.full((bucket_batch, bucket_seq), self.pad_token_id, dtype=input_ids.dtype, device=self.device)
+        mask = torch.zeros((bucket_batch, bucket_seq), dtype=attention_mask.dtype, device=self.device)
+        ids[:batch, pad_seq:] = input_ids
+        mask[:batch, pad_seq:] = attention_mask
+        # Filler rows attend to one token so their softmax stays finite
+        mask[batch:, -1] = 1
+
+        # Eager mode numbers positions 0..seq_len-1 over its own padded width
+        positions = torch.arange(bucket_seq, device=self.device) - pad_seq
+        position_ids = positions.clamp(min=0).unsqueeze(0).expand(bucket_batch, -1)
+        return ids, mask, position_ids
+
+    def __call__(self, input_ids, attention_mask=None, **kwargs):
+        import torch
+
+        if attention_mask is None:
+            attention_mask = torch.ones_like(input_ids)
+        batch, seq_len = input_ids.shape
+        bucket = self.bucket_for(batch, seq_len)
+        graph = self._graphs.get(bucket) if bucket is not None else None
+
+        if graph is None:
+            self.calls["eager"] += 1
+            logits = self.model(input_ids=input_ids, attention_mask=attention_mask, **kwargs).logits[:, -1, :]
+        else:
+            self.calls["compiled"] += 1
+            logits = graph(*self._pad_to_bucket(input_ids, attention_mask, bucket))[:batch]
+        # Shape (batch, 1, vocab) so callers can keep using .logits[:, -1, :]
+        return SimpleNamespace(logits=logits.unsqueeze(1))
+
+    def parameters(self):
+        return self.model.parameters()
+
+    def buffers(self):
+        return self.model.buffers()
+
+    def startup_report(self):
+        """Startup cost of precompilation"""
+        return {
+            "mode": self.mode,
+            "buckets": len(self.batch_buckets) * len(self.seq_buckets),
+            "compiled": len(self._graphs),
+            "failed": dict(self.failed),
+            "total_seconds": sum(self.compile_seconds.values()),
+            "per_bucket_seconds": {f"{b}x{s}": t for (b, s), t in self.compile_seconds.items()}
+        }
+
+
+def enable_compiled(model_info, mode="compile", batch_buckets=DEFAULT_BATCH_BUCKETS,
+                    seq_buckets=DEFAULT_SEQ_BUCKETS, verbose=False):
+    """Return a copy of model_info whose model runs through precompiled shape buckets"""
+    model = model_info["model"]
+    bucketed = BucketedModel(model, model_info["tokenizer"].pad_token_id, batch_buckets, seq_buckets, mode)
+    bucketed.precompile(verbose=verbose)
+    return dict(model_info, model=bucketed, eager_model=model)
+
+
+def benchmark(model_info, compiled_info, pairs, batch_size, iterations=5):
+    """Steady-state eager vs compiled throughput and the largest score difference"""
+    import numpy as np
+    import torch
+    from reranker import process_inputs, compute_logits
+
+    def run(info):
+        scores = []
+        with torch.inference_mode():
+            for start in range(0, len(pairs), batch_size):
+                inputs = process_inputs(pairs[start:start + batch_size], info['tokenizer'], info['prefix_tokens'],
+                                        info['suffix_tokens'], info['max_length'], info['model'])
+                scores.append(compute_logits(inputs, info['model'], info['token_true_id'], info['token_false_id']))
+        return np.concatenate(scores)
+
+    results = {}
+    for name, info in (("eager", model_info), ("compiled", compiled_info)):
+        scores = run(info)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            run(info)
+        elapsed = (time.perf_counter() - start) / iterations
+        results[name] = {"seconds": elapsed, "pairs_per_second": len(pairs) / elapsed, "scores": scores}
+
+    return {
+        "eager_pairs_per_second": results["eager"]["pairs_per_second"],
+        "compiled_pairs_per_second": results["compiled"]["pairs_per_second"],
+        "speedup": results["eager"]["seconds"] / results["compiled"]["seconds"],
+        "max_abs_score_diff": float(np.max(np.abs(results["eager"]["scores"] - results["compiled"]["scores"])))
+    }
+
+
+def main():
+    from autotune import build_pairs, parse_ints
+    from reranker import DEFAULT_MODEL_ID, load_model_info
+
+    parser = argparse.ArgumentParser(description="Measure compiled shape-bucket scoring")
+    parser.add_argument("--model", default=DEFAULT_MODEL_ID, help="Model id or path")
+    parser.add_argument("--mode", choices=MODES, default="compile")
+    parser.add_argument("--batch-buckets", type=parse_ints, default=DEFAULT_BATCH_BUCKETS)
+    parser.add_argument("--seq-buckets", type=parse_ints, default=DEFAULT_SEQ_BUCKETS)
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--pairs", type=int, default=64)
+    parser.add_argument("--doc-words", type=int, default=128)
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    print("⚙️  Compiled Shape-Bucket Scoring")
+    print("=" * 50)
+    model_info = load_model_info(args.model)
+
+    compiled_info = enable_compiled(model_info, args.mode, args.batch_buckets, args.seq_buckets, verbose=True)
+    report = compiled_info["model"].startup_report()
+    print(f"\n🕐 Startup: {report['compiled']}/{report['buckets']} buckets in {report['total_seconds']:.2f}s "
+          f"({len(report['failed'])} fell back to eager)")
+
+    pairs = build_pairs(args.doc_words, args.pairs)
+    result = benchmark(model_info, compiled_info, pairs, args.batch_size, args.iterations)
+    calls = compiled_info["model"].calls
+    print(f"🚀 Eager:    {result['eager_pairs_per_second']:.2f} pairs/s")
+    print(f"🚀 Compiled: {result['compiled_pairs_per_second']:.2f} pairs/s ({result['speedup']:.2f}x)")
+    print(f"📏 Max score difference vs eager: {result['max_abs_score_diff']:.2e}")
+    print(f"📊 Calls: {calls['compiled']} compiled, {calls['eager']} eager fallback")
+    if result["speedup"] > 1:
+        breakeven = report["total_seconds"] / max(1e-9, len(pairs) / result["eager_pairs_per_second"]
+                                                  - len(pairs) / result["compiled_pairs_per_second"])
+        print(f"💡 Startup cost pays off after ~{breakeven * len(pairs):.0f} pairs")
+    else:
+        print("💡 No steady-state speedup on this host; keep eager mode")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
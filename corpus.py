@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Test Corpus Index and Loader
+============================
+
+Single corpus subsystem shared by all runners. Instead of globbing and eagerly
+parsing every case file, it builds a lightweight index with one entry per case:
+
+    name, path, offset, length, documents, mtime, size, model, top_n,
+    has_instruction, expected_to_fail
+
+Cases are then loaded lazily by seeking to their byte offset.
+
+Two source formats are supported:
+- tests/test_*.json: one case per file (the case name is the file stem)
+- *.jsonl shards: one case per line (name from the "name" field, or
+  "<shard stem>_<line number>"), suitable for millions of cases
+
+The index is cached in tests/.corpus_index.jsonl (or <shard>.idx for shards
+loaded on their own) and keyed on each source file's mtime and size, so
+filtering by name, document count or metadata only re-scans files that changed.
+Each source starts with a marker row (path, mtime, size), so sources with no
+cases or that failed to parse are cached as fresh too. Only a per-source
+summary of the cache is held in memory; entries and cases are streamed, and
+each shard is opened once while its cases are loaded.
+
+Usage:
+    python corpus.py                       # show index summary
+    python corpus.py --max-documents 3     # list matching cases
+"""
+
+import argparse
+import glob
+import itertools
+import json
+import os
+
+import metrics
+
+DEFAULT_ROOT = "tests"
+DEFAULT_PATTERNS = ("test_*.json", "test_*.jsonl")
+INDEX_FILENAME = ".corpus_index.jsonl"
+
+
+def _case_entry(case, name, path, offset, length, stat):
+    """Build an index entry from a parsed case"""
+    metadata = case.get("_test_metadata", {})
+    return {
+        "name": name,
+        "path": path,
+        "offset": offset,
+        "length": length,
+        "documents": len(case.get("documents", [])),
+        "mtime": stat.st_mtime,
+        "size": stat.st_size,
+        "model": case.get("model"),
+        "top_n": case.get("top_n"),
+        "has_instruction": "instruction" in case,
+        "expected_to_fail": metadata.get("expected_to_fail", False)
+    }
+
+
+def scan_file(path):
+    """Scan one source file, yielding its index entries"""
+    stat = os.stat(path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    if path.endswith(".jsonl"):
+        offset = 0
+        with open(path, "rb") as f:
+            for line_number, line in enumerate(f, start=1):
+                length = len(line)
+                if line.strip():
+                    try:
+                        case = json.loads(line)
+                        name = case.get("name") or f"{stem}_{line_number}"
+                        yield _case_entry(case, name, path, offset, length, stat)
+                    except ValueError as e:
+                        print(f"⚠️  Warning: Could not index {path}:{line_number}: {e}")
+                offset += length
+        return
+
+    with open(path, "rb") as f:
+        data = f.read()
+    case = json.loads(data)
+    yield _case_entry(case, stem, path, 0, len(data), stat)
+
+
+def find_sources(root=DEFAULT_ROOT, patterns=DEFAULT_PATTERNS):
+    """Find corpus source files under root"""
+    sources = set()
+    for pattern in patterns:
+        sources.update(glob.glob(os.path.join(root, pattern)))
+    return sorted(sources)
+
+
+def _read_cache_summary(index_path):
+    """Summarize a cached index as {path: {mtime, size, start, end}} byte ranges
+
+    Each source's marker row is followed by its entries, so only one summary
+    per source file is kept in memory, however many cases the index holds.
+    """
+    summary = {}
+    if not os.path.exists(index_path):
+        return summary
+    try:
+        with open(index_path, "rb") as f:
+            offset = 0
+            for line in f:
+                row = json.loads(line)
+                offset += len(line)
+                if row.get("source"):
+                    summary[row["path"]] = {"mtime": row["mtime"], "size": row["size"],
+                                            "start": offset, "end": offset}
+                else:
+                    summary[row["path"]]["end"] = offset
+    except (OSError, ValueError, KeyError):
+        # A corrupt cache is simply rebuilt
+        return {}
+    return summary
+
+
+def _is_fresh(source, path):
+    """Whether a cache summary still matches the source file on disk"""
+    if source is None:
+        return False
+    stat = os.stat(path)
+    return source["mtime"] == stat.st_mtime and source["size"] == stat.st_size
+
+
+def _iter_entries(sources, summary, index_path):
+    """Yield entries for sources, from the cache when fresh and by scanning otherwise"""
+    cache = None
+    try:
+        for path in sources:
+            try:
+                source = summary.get(path)
+                if _is_fresh(source, path):
+                    if cache is None:
+                        cache = open(index_path, "rb")
+                    cache.seek(source["start"])
+                    while cache.tell() < source["end"]:
+                        yield json.loads(cache.readline())
+                else:
+                    yield from scan_file(path)
+            except Exception as e:
+                print(f"⚠️  Warning: Could not index {path}: {e}")
+    finally:
+        if cache is not None:
+            cache.close()
+
+
+def build_index(root=DEFAULT_ROOT, patterns=DEFAULT_PATTERNS, sources=None, index_path=None, use_cache=True):
+    """Build (or refresh) the corpus index
+
+    Args:
+        root: Directory containing the case files
+        patterns: Glob patterns relative to root
+        sources: Explicit list of source files (overrides root/patterns)
+        index_path: Where to cache the index (default: <root>/.corpus_index.jsonl)
+        use_cache: Reuse cached entries for unchanged files
+
+    Returns:
+        Lazy iterator over index entries in source order
+    """
+    if sources is None:
+        sources = find_sources(root, patterns)
+    if index_path is None:
+        index_path = os.path.join(root, INDEX_FILENAME)
+
+    summary = _read_cache_summary(index_path) if use_cache else {}
+    hits = 0
+    for path in sources:
+        try:
+            hits += _is_fresh(summary.get(path), path)
+        except OSError:
+            pass
+    if sources:
+        metrics.CACHE_HIT_RATIO.set(hits / len(sources), cache="corpus_index")
+
+    if use_cache and (hits < len(sources) or set(summary) != set(sources)):
+        # Stream the refreshed index to disk, copying unchanged sources from the old cache
+        try:
+            tmp_path = index_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                for path in sources:
+                    try:
+                        stat = os.stat(path)
+                    except OSError as e:
+                        print(f"⚠️  Warning: Could not index {path}: {e}")
+                        continue
+                    # Written even when the source yields no entries, so it still counts as fresh
+                    f.write(json.dumps({"source": True, "path": path, "mtime": stat.st_mtime,
+                                        "size": stat.st_size}) + "\n")
+                    for entry in _iter_entries([path], summary, index_path):
+                        f.write(json.dumps(entry) + "\n")
+            os.replace(tmp_path, index_path)
+            summary = _read_cache_summary(index_path)
+        except OSError as e:
+            print(f"⚠️  Warning: Could not write corpus index {index_path}: {e}")
+
+    return _iter_entries(sources, summary, index_path)
+
+
+def filter_index(entries, names=None, min_documents=None, max_documents=None,
+                 expected_to_fail=None, model=None, path=None):
+    """Filter index entries without loading any cases"""
+    if names is not None:
+        names = set(names)
+    for entry in entries:
+        if names is not None and entry["name"] not in names:
+            continue
+        if min_documents is not None and entry["documents"] < min_documents:
+            continue
+        if max_documents is not None and entry["documents"] > max_documents:
+            continue
+        if expected_to_fail is not None and entry["expected_to_fail"] != expected_to_fail:
+            continue
+        if model is not None and entry["model"] != model:
+            continue
+        if path is not None and entry["path"] != path:
+            continue
+        yield entry
+
+
+def load_case(entry, f=None):
+    """Load a single test case from its index entry
+
+    f is an optional already-open binary handle on entry["path"].
+    """
+    if f is None:
+        with open(entry["path"], "rb") as f:
+            return load_case(entry, f)
+    f.seek(entry["offset"])
+    test_data = json.loads(f.read(entry["length"]))
+
+    # Create test case structure
+    test_case = {
+        "name": entry["name"],
+        "file": entry["path"],
+        "query": test_data.get("query", ""),
+        "documents": test_data.get("documents", [])
+    }
+
+    # Add optional parameters if present
+    for key in ("instruction", "top_n", "model", "_test_metadata"):
+        if key in test_data:
+            test_case[key] = test_data[key]
+
+    return test_case
+
+
+def iter_cases(entries):
+    """Lazily load test cases for the given index entries, one open handle per shard"""
+    for path, group in itertools.groupby(entries, key=lambda entry: entry["path"]):
+        try:
+            f = open(path, "rb")
+        except OSError as e:
+            print(f"⚠️  Warning: Could not open {path}: {e}")
+            continue
+        with f:
+            for entry in group:
+                try:
+                    yield load_case(entry, f)
+                except Exception as e:
+                    print(f"⚠️  Warning: Could not load {entry['name']} from {entry['path']}: {e}")
+
+
+def load_test_cases(root=DEFAULT_ROOT, **filters):
+    """Lazily load test cases from the corpus index (default: tests/test_*.json)"""
+    return iter_cases(filter_index(build_index(root), **filters))
+
+
+def load_shard(path, **filters):
+    """Lazily load test cases from a single JSONL shard"""
+    entries = build_index(sources=[path], index_path=path + ".idx")
+    return iter_cases(filter_index(entries, **filters))
+
+
+def main():
+    """Show the corpus index"""
+    parser = argparse.ArgumentParser(description="Index and filter the test corpus")
+    parser.add_argument("--root", default=DEFAULT_ROOT, help="Corpus directory")
+    parser.add_argument("--name", action="append", help="Only include named cases")
+    parser.add_argument("--min-documents", type=int)
+    parser.add_argument("--max-documents", type=int)
+    parser.add_argument("--model")
+    parser.add_argument("--expected-to-fail", choices=["true", "false"])
+    args = parser.parse_args()
+
+    expected = None if args.expected_to_fail is None else args.expected_to_fail == "true"
+    total = 0
+    matched = 0
+
+    def counted(entries):
+        nonlocal total
+        for entry in entries:
+            total += 1
+            yield entry
+
+    print("📚 Test Corpus Index")
+    print("=" * 40)
+    for entry in filter_index(counted(build_index(args.root)), names=args.name, min_documents=args.min_documents,
+                              max_documents=args.max_documents, expected_to_fail=expected, model=args.model):
+        matched += 1
+        print(f"  {entry['name']}: {entry['documents']} documents ({entry['path']})")
+    print(f"\n📊 {matched}/{total} cases matched")
+
+
+if __name__ == "__main__":
+    main()
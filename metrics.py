@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Reranking Metrics
+=================
+
+Minimal Prometheus-style metrics for the reranking path, with no extra
+dependencies. Both the Transformers scorer (test_official.py) and the Ollama
+client (test_ollama.py) feed the metrics defined at the bottom of this module.
+
+Metric types:
+    Counter   - Monotonic totals (requests, pairs, tokens, errors)
+    Gauge     - Point-in-time values (cache hit ratio, queue depth)
+    Histogram - Bucketed distributions (latency, batch size, sequence length, padding)
+
+Updates take one dict lookup and a short per-metric lock, so the hot path
+overhead is negligible.
+
+Exposition:
+    METRICS_PORT=9464 python test_official.py      # serve http://localhost:9464/metrics
+    METRICS_FILE=results/metrics.prom python test_ollama.py   # dump on exit
+
+Usage:
+    python metrics.py --port 9464                  # serve an (empty) registry for testing
+"""
+
+import argparse
+import bisect
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+TOKEN_BUCKETS = (32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+RATIO_BUCKETS = (0.0, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers (0.0 for an empty list)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(1, math.ceil(pct / 100 * len(ordered))) - 1]
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class holding per-label-set values"""
+
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing total"""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down"""
+
+    type_name = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed distribution with sum and count"""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        # Index of the first bucket whose upper bound is >= value (len(buckets) means +Inf)
+        slot = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][slot] += 1
+            state[1] += value
+            state[2] += 1
+
+    def observe_many(self, values, **labels):
+        """Observe several values under a single lock acquisition"""
+        key = self._key(labels)
+        slots = [bisect.bisect_left(self.buckets, v) for v in values]
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            for slot in slots:
+                state[0][slot] += 1
+            state[1] += sum(values)
+            state[2] += len(slots)
+
+    def snapshot(self, **labels):
+        """Return (bucket_counts, sum, count) for a label set"""
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return [0] * (len(self.buckets) + 1), 0.0, 0
+            return list(state[0]), state[1], state[2]
+
+    def _render_sample(self, key, value):
+        counts, total, count = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, *args, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Metric {name} already registered as {metric.type_name}")
+            return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter, name, documentation, labelnames)
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._register(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def dump(path, registry=REGISTRY):
+    """Write the current metrics to a file (atomically)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(registry.render())
+    os.replace(tmp_path, path)
+
+
+def start_http_server(port, addr="127.0.0.1", registry=REGISTRY):
+    """Serve /metrics on a daemon thread and return the server"""
+
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/", "/metrics"):
+                self.send_error(404)
+                return
+            data = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((addr, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def start_from_env():
+    """Start the metrics endpoint if METRICS_PORT is set"""
+    port = os.getenv("METRICS_PORT")
+    if not port:
+        return None
+    server = start_http_server(int(port), os.getenv("METRICS_ADDR", "127.0.0.1"))
+    print(f"📈 Metrics available at http://{server.server_address[0]}:{server.server_address[1]}/metrics")
+    return server
+
+
+def dump_from_env():
+    """Dump metrics to METRICS_FILE if it is set"""
+    path = os.getenv("METRICS_FILE")
+    if path:
+        dump(path)
+        print(f"📈 Metrics written to: {path}")
+
+
+# Metrics for the reranking path, labelled by backend ("transformers" or "ollama")
+REQUESTS = REGISTRY.counter("reranker_requests_total", "Rerank requests processed", ["backend"])
+ERRORS = REGISTRY.counter("reranker_errors_total", "Rerank requests that failed", ["backend"])
+PAIRS = REGISTRY.counter("reranker_pairs_total", "Query/document pairs scored", ["backend"])
+TOKENS = REGISTRY.counter("reranker_tokens_total", "Non-padding tokens fed to the model", ["backend"])
+LATENCY = REGISTRY.histogram("reranker_request_latency_seconds", "End-to-end rerank latency", ["backend"])
+BATCH_SIZE = REGISTRY.histogram("reranker_batch_size", "Pairs per model batch or HTTP request",
+                                ["backend"], buckets=SIZE_BUCKETS)
+SEQUENCE_LENGTH = REGISTRY.histogram("reranker_sequence_length_tokens", "Tokens per pair before padding",
+                                     ["backend"], buckets=TOKEN_BUCKETS)
+PADDING_RATIO = REGISTRY.histogram("reranker_padding_ratio", "Fraction of each padded batch that is padding",
+                                   ["backend"], buckets=RATIO_BUCKETS)
+CACHE_HIT_RATIO = REGISTRY.gauge("reranker_cache_hit_ratio", "Hit ratio of the most recent cache lookup pass",
+                                 ["cache"])
+QUEUE_DEPTH = REGISTRY.gauge("reranker_queue_depth", "Work items waiting or in flight", ["queue"])
+
+
+def main():
+    """Serve the metrics registry"""
+    parser = argparse.ArgumentParser(description="Serve reranker metrics")
+    parser.add_argument("--port", type=int, default=9464)
+    parser.add_argument("--addr", default="127.0.0.1")
+    args = parser.parse_args()
+
+    server = start_http_server(args.port, args.addr)
+    print(f"📈 Serving metrics on http://{args.addr}:{server.server_address[1]}/metrics (Ctrl+C to stop)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
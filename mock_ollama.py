@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Deterministic Local Ollama Stand-In Server
+==========================================
+
+Lightweight mock of the Ollama endpoints used by this test suite, so the
+client and comparison tooling can be load-tested without a real Ollama
+daemon, a model or network access.
+
+Endpoints:
+    POST /api/rerank  - Deterministic relevance scores (same input, same output)
+    GET  /api/tags    - Lists the configured models
+    POST /api/show    - Shows a configured model, 404 for unknown models
+
+Scores are derived from query/document word overlap plus a stable hash, so
+rankings are sensible and fully reproducible. Latency, error rate and
+concurrency are configurable. All randomness comes from a seeded RNG.
+
+Usage:
+    python mock_ollama.py --port 11435 --latency lognormal:0.05:0.5 --error-rate 0.01
+    OLLAMA_HOST=http://localhost:11435 python test_ollama.py
+
+Latency specs (seconds):
+    fixed:<s>                  - Always <s>
+    uniform:<low>:<high>       - Uniform between <low> and <high>
+    normal:<mean>:<stddev>     - Normal, clipped at 0
+    lognormal:<median>:<sigma> - Log-normal with the given median
+Per-document latency (--per-document-latency) is added on top.
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_MODELS = ("qwen_reranker_v2",)
+
+
+def parse_latency(spec):
+    """Parse a latency spec into a sampling function taking an RNG"""
+    kind, *params = spec.split(":")
+    try:
+        params = [float(p) for p in params]
+        if kind == "fixed" and len(params) == 1:
+            return lambda rng: params[0]
+        if kind == "uniform" and len(params) == 2:
+            return lambda rng: rng.uniform(params[0], params[1])
+        if kind == "normal" and len(params) == 2:
+            return lambda rng: max(0.0, rng.gauss(params[0], params[1]))
+        if kind == "lognormal" and len(params) == 2:
+            return lambda rng: rng.lognormvariate(math.log(params[0]), params[1]) if params[0] > 0 else 0.0
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+def _words(text):
+    return set(re.findall(r"\w+", text.lower()))
+
+
+def deterministic_score(query, document, instruction=""):
+    """Deterministic relevance score in [0, 1] for a query/document pair"""
+    query_words = _words(query)
+    overlap = len(query_words & _words(document)) / len(query_words) if query_words else 0.0
+    digest = hashlib.sha256(f"{instruction}\x00{query}\x00{document}".encode("utf-8")).digest()
+    jitter = int.from_bytes(digest[:4], "big") / 0xFFFFFFFF
+    return 0.8 * overlap + 0.2 * jitter
+
+
+class MockOllamaState:
+    """Configuration and counters shared by all request handlers"""
+
+    def __init__(self, models=DEFAULT_MODELS, latency="fixed:0", per_document_latency=0.0,
+                 error_rate=0.0, max_concurrency=0, reject_when_busy=False, seed=0):
+        self.models = list(models)
+        self.sample_latency = parse_latency(latency)
+        self.per_document_latency = per_document_latency
+        self.error_rate = error_rate
+        self.reject_when_busy = reject_when_busy
+        self.semaphore = threading.BoundedSemaphore(max_concurrency) if max_concurrency > 0 else None
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "rejected": 0, "in_flight": 0, "max_in_flight": 0}
+
+    def draw(self):
+        """Draw (latency, should_fail) from the seeded RNG"""
+        with self.rng_lock:
+            return self.sample_latency(self.rng), self.rng.random() < self.error_rate
+
+    def count(self, key, delta=1):
+        with self.stats_lock:
+            self.stats[key] += delta
+            if key == "in_flight":
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Request handler implementing the mocked Ollama endpoints"""
+
+    server_version = "MockOllama/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            return json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return None
+
+    def do_GET(self):
+        if self.path == "/api/tags":
+            self._send_json(200, {"models": [{"name": name, "model": name} for name in self.state.models]})
+        elif self.path == "/api/mock/stats":
+            with self.state.stats_lock:
+                self._send_json(200, dict(self.state.stats))
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def do_POST(self):
+        body = self._read_json()
+        if body is None:
+            self._send_json(400, {"error": "invalid JSON"})
+            return
+
+        if self.path == "/api/show":
+            name = body.get("name") or body.get("model")
+            if name not in self.state.models:
+                self._send_json(404, {"error": f"model '{name}' not found"})
+            else:
+                self._send_json(200, {"name": name, "modelfile": f"# Mock model {name}",
+                                      "details": {"family": "qwen3", "format": "mock"}})
+        elif self.path == "/api/rerank":
+            self._rerank(body)
+        else:
+            self._send_json(404, {"error": "not found"})
+
+    def _rerank(self, body):
+        state = self.state
+        if state.semaphore is not None:
+            if not state.semaphore.acquire(blocking=not state.reject_when_busy):
+                state.count("rejected")
+                self._send_json(503, {"error": "server busy, please try again"})
+                return
+        state.count("requests")
+        state.count("in_flight")
+        try:
+            model = body.get("model")
+            if model not in state.models:
+                state.count("errors")
+                self._send_json(404, {"error": f"model '{model}' not found"})
+                return
+
+            documents = body.get("documents", [])
+            latency, should_fail = state.draw()
+            time.sleep(latency + state.per_document_latency * len(documents))
+
+            if should_fail:
+                state.count("errors")
+                self._send_json(500, {"error": "injected failure"})
+                return
+
+            query = body.get("query", "")
+            instruction = body.get("instruction", "")
+            results = [
+                {"index": idx, "document": doc, "relevance_score": deterministic_score(query, doc, instruction)}
+                for idx, doc in enumerate(documents)
+            ]
+            results.sort(key=lambda r: r["relevance_score"], reverse=True)
+            if body.get("top_n"):
+                results = results[:body["top_n"]]
+
+            self._send_json(200, {"model": model, "results": results})
+        finally:
+            state.count("in_flight", -1)
+            if state.semaphore is not None:
+                state.semaphore.release()
+
+
+def create_server(host="127.0.0.1", port=11435, verbose=False, **state_options):
+    """Create (but do not start) a mock Ollama server
+
+    Pass port=0 to bind an ephemeral port; read it back from server.server_address.
+    """
+    server = ThreadingHTTPServer((host, port), MockOllamaHandler)
+    server.daemon_threads = True
+    server.state = MockOllamaState(**state_options)
+    server.verbose = verbose
+    return server
+
+
+def start_in_background(**options):
+    """Start a mock server on a daemon thread and return (server, base_url)"""
+    server = create_server(**options)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+
+def main():
+    """Run the mock Ollama server"""
+    parser = argparse.ArgumentParser(description="Deterministic local Ollama stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--model", action="append", dest="models",
+                        help="Model name to serve (repeatable, default: qwen_reranker_v2)")
+    parser.add_argument("--latency", default="fixed:0", help="Base latency spec, e.g. lognormal:0.05:0.5")
+    parser.add_argument("--per-document-latency", type=float, default=0.0, help="Seconds added per document")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of rerank calls failing with 500")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Concurrent rerank limit (0 = unlimited)")
+    parser.add_argument("--reject-when-busy", action="store_true", help="Return 503 instead of queueing at the limit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = create_server(
+        host=args.host, port=args.port, verbose=args.verbose,
+        models=args.models or DEFAULT_MODELS, latency=args.latency,
+        per_document_latency=args.per_document_latency, error_rate=args.error_rate,
+        max_concurrency=args.max_concurrency, reject_when_busy=args.reject_when_busy, seed=args.seed
+    )
+    host, port = server.server_address[:2]
+    print(f"🧪 Mock Ollama serving {', '.join(server.state.models)} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"📊 Stats: {server.state.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Reranker Model Registry
+=======================
+
+Routes requests to reranker variants by the test case / request `model` field.
+Variants can differ in size and precision. They are loaded on first use and
+kept resident under a memory budget. Before a model is loaded, its size is
+estimated from its config (parameter count x dtype size, computed on the meta
+device), and the least recently used models are evicted until it fits, so
+peak memory stays within the budget.
+
+Unknown model names raise UnknownModelError before anything is loaded or
+evicted, mirroring Ollama's "model not found" behaviour.
+
+Built-in models (Ollama-style aliases map onto the Hugging Face checkpoints):
+    qwen_reranker_v2 / Qwen/Qwen3-Reranker-0.6B   - 0.6B
+    qwen3-reranker-0.6b-fp16                      - 0.6B in float16
+    Qwen/Qwen3-Reranker-4B, Qwen/Qwen3-Reranker-8B
+
+Usage:
+    registry = ModelRegistry(memory_budget_mb=4096)
+    results = registry.rerank({"model": "qwen_reranker_v2", "query": q, "documents": docs})
+
+Environment Variables:
+    RERANKER_MEMORY_BUDGET_MB: Memory budget for resident models (default: unlimited)
+    RERANKER_MODELS: JSON file with extra {name: {model_id, dtype, template, max_length}} specs
+"""
+
+import gc
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import metrics
+from rerank_result import RerankResults
+from reranker import DEFAULT_MODEL_ID, MAX_LENGTH, TEMPLATES, TransformersBackend
+
+DEFAULT_MODELS = {
+    "qwen_reranker_v2": {"model_id": DEFAULT_MODEL_ID},
+    DEFAULT_MODEL_ID: {"model_id": DEFAULT_MODEL_ID},
+    "qwen3-reranker-0.6b-fp16": {"model_id": DEFAULT_MODEL_ID, "dtype": "float16"},
+    "Qwen/Qwen3-Reranker-4B": {"model_id": "Qwen/Qwen3-Reranker-4B"},
+    "Qwen/Qwen3-Reranker-8B": {"model_id": "Qwen/Qwen3-Reranker-8B"},
+}
+
+LOADED_MODELS = metrics.REGISTRY.gauge("reranker_models_loaded", "Reranker models resident in memory")
+RESIDENT_BYTES = metrics.REGISTRY.gauge("reranker_models_resident_bytes", "Bytes held by resident models")
+EVICTIONS = metrics.REGISTRY.counter("reranker_model_evictions_total", "Models evicted to stay under budget")
+
+
+class UnknownModelError(KeyError):
+    """Raised for model names that are not registered"""
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.name = name
+
+    def __str__(self):
+        return f"model '{self.name}' not found"
+
+
+def model_bytes(model):
+    """Bytes held by a model's parameters and buffers"""
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def estimate_model_bytes(model_id, dtype=None):
+    """Bytes a model will hold once loaded, computed from its config without loading weights
+
+    dtype defaults to the checkpoint's dtype from the config.
+    """
+    import torch
+    from transformers import AutoConfig, AutoModelForCausalLM
+
+    config = AutoConfig.from_pretrained(model_id)
+    with torch.device("meta"):
+        model = AutoModelForCausalLM.from_config(config)
+    if dtype is None:
+        dtype = getattr(config, "dtype", None) or getattr(config, "torch_dtype", None) or torch.float32
+    if isinstance(dtype, str):
+        dtype = getattr(torch, dtype)
+    element_size = torch.empty(0, dtype=dtype).element_size()
+    return sum(t.numel() for t in list(model.parameters()) + list(model.buffers())) * element_size
+
+
+def load_model_specs(path):
+    """Load extra model specs from a JSON file"""
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class ModelRegistry:
+    """Lazily loaded reranker variants with LRU eviction under a memory budget"""
+
+    def __init__(self, specs=None, memory_budget_mb=None, default_model="qwen_reranker_v2",
+                 backend_factory=TransformersBackend, size_estimator=estimate_model_bytes):
+        """
+        Args:
+            specs: {name: spec} mapping (default: DEFAULT_MODELS plus RERANKER_MODELS)
+            memory_budget_mb: Budget for resident models (default: RERANKER_MEMORY_BUDGET_MB or unlimited)
+            default_model: Model used when a request has no `model` field
+            backend_factory: Callable building a backend from spec keyword arguments
+            size_estimator: Callable (model_id, dtype) -> bytes used to evict before loading
+        """
+        if specs is None:
+            specs = dict(DEFAULT_MODELS)
+            extra = os.getenv("RERANKER_MODELS")
+            if extra:
+                specs.update(load_model_specs(extra))
+        if memory_budget_mb is None and os.getenv("RERANKER_MEMORY_BUDGET_MB"):
+            memory_budget_mb = float(os.getenv("RERANKER_MEMORY_BUDGET_MB"))
+
+        self.specs = {}
+        for name, spec in specs.items():
+            self.register(name, **spec)
+        self.default_model = default_model
+        self.memory_budget = None if memory_budget_mb is None else int(memory_budget_mb * 1024 * 1024)
+        self.backend_factory = backend_factory
+        self.size_estimator = size_estimator
+
+        self._loaded = OrderedDict()  # spec key -> (backend, bytes)
+        self._lock = threading.Lock()
+        self._load_locks = {}
+        self._hits = 0
+        self._misses = 0
+
+    def register(self, name, model_id, dtype=None, template="corrected", max_length=MAX_LENGTH):
+        """Register (or replace) a model variant"""
+        if template not in TEMPLATES:
+            raise ValueError(f"Unknown template '{template}' for model '{name}'")
+        self.specs[name] = {"model_id": model_id, "dtype": dtype, "template": template, "max_length": max_length}
+
+    def resolve(self, name=None):
+        """Return the spec for a model name, raising UnknownModelError without side effects"""
+        name = name or self.default_model
+        spec = self.specs.get(name)
+        if spec is None:
+            raise UnknownModelError(name)
+        return spec
+
+    @staticmethod
+    def _key(spec):
+        # Aliases of the same variant share one loaded model
+        return (spec["model_id"], spec["dtype"], spec["template"], spec["max_length"])
+
+    def get(self, name=None):
+        """Return the backend for a model, loading (and evicting) as needed"""
+        spec = self.resolve(name)
+        key = self._key(spec)
+
+        with self._lock:
+            if key in self._loaded:
+                self._loaded.move_to_end(key)
+                self._hits += 1
+                self._update_metrics()
+                return self._loaded[key][0]
+            load_lock = self._load_locks.setdefault(key, threading.Lock())
+
+        # Load outside the registry lock so other models stay usable meanwhile
+        with load_lock:
+            with self._lock:
+                if key in self._loaded:
+                    self._loaded.move_to_end(key)
+                    self._hits += 1
+                    self._update_metrics()
+                    return self._loaded[key][0]
+
+            # Make room before loading so the new model never overshoots the budget
+            estimate = self._estimate(spec)
+            if estimate:
+                with self._lock:
+                    self._evict_for(estimate)
+
+            backend = self.backend_factory(model_id=spec["model_id"], dtype=spec["dtype"],
+                                           template=spec["template"], max_length=spec["max_length"])
+            size = model_bytes(backend.model_info["model"])
+
+            with self._lock:
+                self._misses += 1
+                # Correct for an estimate that came out low
+                self._evict_for(size)
+                self._loaded[key] = (backend, size)
+                self._update_metrics()
+            return backend
+
+    def _estimate(self, spec):
+        """Estimated bytes for a spec, or None if it cannot be estimated"""
+        if self.memory_budget is None or self.size_estimator is None:
+            return None
+        try:
+            return self.size_estimator(spec["model_id"], spec["dtype"])
+        except Exception as e:
+            print(f"⚠️  Warning: Could not estimate size of {spec['model_id']}: {e}")
+            return None
+
+    def _evict_for(self, size):
+        """Evict least recently used models until `size` more bytes fit (lock held)"""
+        if self.memory_budget is None:
+            return
+        evicted = False
+        while self._loaded and self.resident_bytes() + size > self.memory_budget:
+            key, (_, evicted_size) = self._loaded.popitem(last=False)
+            print(f"♻️  Evicting {key[0]} ({evicted_size / 1024 / 1024:.0f} MB) to stay under budget")
+            EVICTIONS.inc()
+            evicted = True
+        if size > self.memory_budget:
+            print(f"⚠️  Model needs {size / 1024 / 1024:.0f} MB, more than the whole "
+                  f"{self.memory_budget / 1024 / 1024:.0f} MB budget")
+        if evicted:
+            gc.collect()
+
+    def resident_bytes(self):
+        return sum(size for _, size in self._loaded.values())
+
+    def _update_metrics(self):
+        LOADED_MODELS.set(len(self._loaded))
+        RESIDENT_BYTES.set(self.resident_bytes())
+        total = self._hits + self._misses
+        if total:
+            metrics.CACHE_HIT_RATIO.set(self._hits / total, cache="model_registry")
+
+    def loaded(self):
+        """Resident model variants, least recently used first"""
+        with self._lock:
+            return [{"model_id": key[0], "dtype": key[1], "template": key[2], "bytes": size}
+                    for key, (_, size) in self._loaded.items()]
+
+    def unload(self, name):
+        """Drop a model from memory if it is loaded"""
+        key = self._key(self.resolve(name))
+        with self._lock:
+            removed = self._loaded.pop(key, None)
+            self._update_metrics()
+        if removed is not None:
+            gc.collect()
+        return removed is not None
+
+    def rerank(self, request):
+        """Rerank a test-case-shaped request, routed by its `model` field"""
+        backend = self.get(request.get("model"))
+        documents = request["documents"]
+        if not documents:
+            return RerankResults.empty(documents)
+        scores = backend.score(request["query"], documents, request.get("instruction"))
+        return RerankResults.from_scores(scores, documents, top_n=request.get("top_n"))
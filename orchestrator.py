@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+In-Process Comparison Orchestrator
+==================================
+
+Runs the Ollama and official Qwen3-Reranker backends side-by-side in one
+process instead of launching test_ollama.py and test_official.py as two
+sequential subprocesses.
+
+- Ollama requests are HTTP-bound, so they are fanned out over a small thread pool
+- Official scoring is CPU-bound (torch releases the GIL), so it runs on a
+  single dedicated worker that loads the model once and scores cases in order
+- Each test case is compared as soon as both sides have finished
+
+Total wall-clock time ends up close to the slower backend alone rather than
+the sum of both.
+
+Usage:
+    python orchestrator.py
+
+Environment Variables:
+    OLLAMA_WORKERS: Number of concurrent Ollama requests (default: 4)
+"""
+
+import json
+import os
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+from compare_results import compare_results
+from corpus import load_test_cases
+from rerank_result import json_default
+from test_ollama import test_ollama_reranker, is_test_passed
+
+
+def get_ollama_workers():
+    """Get number of concurrent Ollama requests from environment"""
+    return int(os.getenv("OLLAMA_WORKERS", "4"))
+
+
+def iter_comparisons(test_cases, ollama_workers=None):
+    """Run both backends concurrently, yielding each case once both sides finish
+
+    Yields (test_case, ollama_result, official_result, comparison) tuples in
+    completion order, not test case order. test_cases may be any iterable
+    (e.g. corpus.load_test_cases()); cases are tracked by position, so
+    duplicate names are fine here.
+    """
+    # Imported lazily so that merely importing this module does not pull in torch
+    from test_official import load_registry, test_official_routed
+
+    test_cases = list(test_cases)
+    if ollama_workers is None:
+        ollama_workers = get_ollama_workers()
+
+    ollama_pool = ThreadPoolExecutor(max_workers=max(1, ollama_workers), thread_name_prefix="ollama")
+    official_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="official")
+
+    try:
+        # The single official worker loads the model first, then scores cases in order
+        registry_future = official_pool.submit(load_registry)
+
+        def score_official(test_case):
+            registry, error = registry_future.result()
+            if error:
+                return {
+                    "success": False,
+                    "results": [],
+                    "time": 0,
+                    "error": f"Failed to load model: {error}"
+                }
+            return test_official_routed(test_case, registry)
+
+        futures = {}
+        for position, test_case in enumerate(test_cases):
+            futures[ollama_pool.submit(test_ollama_reranker, test_case)] = (position, "ollama")
+        for position, test_case in enumerate(test_cases):
+            futures[official_pool.submit(score_official, test_case)] = (position, "official")
+
+        pending = {position: {} for position in range(len(test_cases))}
+        metrics.QUEUE_DEPTH.set(len(pending), queue="comparisons")
+
+        for future in as_completed(futures):
+            position, side = futures[future]
+            pending[position][side] = future.result()
+
+            if len(pending[position]) == 2:
+                sides = pending.pop(position)
+                metrics.QUEUE_DEPTH.set(len(pending), queue="comparisons")
+                comparison = compare_results(sides["ollama"], sides["official"])
+                yield test_cases[position], sides["ollama"], sides["official"], comparison
+    finally:
+        ollama_pool.shutdown(wait=True, cancel_futures=True)
+        official_pool.shutdown(wait=True, cancel_futures=True)
+
+
+def run_tests_in_process(test_cases=None, ollama_workers=None):
+    """Run both backends in-process and save results in the standalone scripts' format
+
+    Returns (ollama_results, official_results) keyed by test name, in the same
+    shape as compare_results.load_results(). Raises ValueError if two cases
+    share a name, since the result files could not tell them apart.
+    """
+    test_cases = list(load_test_cases() if test_cases is None else test_cases)
+    names = [tc["name"] for tc in test_cases]
+    duplicates = sorted(name for name, count in Counter(names).items() if count > 1)
+    if duplicates:
+        raise ValueError(f"Duplicate test case names: {', '.join(duplicates)}")
+
+    ollama_data = {}
+    official_data = {}
+
+    start_time = time.time()
+    for test_case, ollama_result, official_result, comparison in iter_comparisons(test_cases, ollama_workers):
+        name = test_case["name"]
+        ollama_data[name] = {
+            "test_case": test_case,
+            "result": ollama_result,
+            "test_passed": is_test_passed(test_case, ollama_result)
+        }
+        official_data[name] = {
+            "test_case": test_case,
+            "result": official_result
+        }
+
+        if ollama_result["success"] and official_result["success"]:
+            print(f"✅ {name}: ranking match {'YES' if comparison['ranking_match'] else 'NO'}, "
+                  f"similarity {comparison['score_similarity']:.3f} "
+                  f"(ollama {ollama_result['time']:.3f}s, official {official_result['time']:.3f}s)")
+        else:
+            print(f"⚠️  {name}: ollama {'SUCCESS' if ollama_result['success'] else 'FAILED'}, "
+                  f"official {'SUCCESS' if official_result['success'] else 'FAILED'}")
+    elapsed = time.time() - start_time
+
+    # Keep results in test case order so files match the standalone scripts
+    ollama_data = {name: ollama_data[name] for name in names if name in ollama_data}
+    official_data = {name: official_data[name] for name in names if name in official_data}
+
+    os.makedirs("results", exist_ok=True)
+    with open("results/ollama_results.json", "w") as f:
+        json.dump(ollama_data, f, indent=2, default=json_default)
+    with open("results/official_results.json", "w") as f:
+        json.dump(official_data, f, indent=2, default=json_default)
+
+    print(f"⏱️  Both backends finished in {elapsed:.3f}s")
+
+    ollama_results = {name: data["result"] for name, data in ollama_data.items()}
+    official_results = {name: data["result"] for name, data in official_data.items()}
+    return ollama_results, official_results
+
+
+def main():
+    """Run both backends concurrently and save their results"""
+    print("🚀 In-Process Qwen3-Reranker Comparison")
+    print("=" * 50)
+    metrics.start_from_env()
+    run_tests_in_process()
+    print("💾 Results saved to: results/ollama_results.json, results/official_results.json")
+    metrics.dump_from_env()
+
+
+if __name__ == "__main__":
+    main()
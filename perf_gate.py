@@ -0,0 +1,327 @@
+#!/usr/bin/env python3
+"""
+Performance Regression Gate
+===========================
+
+Runs a fixed scoring workload through the Transformers scorer, records
+throughput, latency percentiles and per-stage timings in a local history
+file, and compares the run against a stored baseline.
+
+Workload:
+    - Every tests/test_*.json case with documents
+    - Synthetic long-document cases (deterministic, see --synthetic-*)
+
+Stages timed per request:
+    tokenize    - process_inputs (tokenization, template, padding)
+    forward     - compute_logits (model forward pass and yes/no softmax)
+    postprocess - ranking into RerankResults
+
+Noise handling:
+    The workload is repeated (--repeats) after a warm-up pass. The gate only
+    fails if the mean throughput (or p95 latency) is worse than the baseline
+    by more than --threshold AND Welch's t-test says the difference is
+    significant at 95% confidence.
+
+Usage:
+    python perf_gate.py --save-baseline      # record a baseline
+    python perf_gate.py                      # compare; exit 1 on regression
+
+Files:
+    results/perf_history.jsonl - One record per invocation
+    results/perf_baseline.json - Baseline record used for comparison
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+from corpus import load_test_cases
+from metrics import percentile
+from rerank_result import RerankResults
+from reranker import DEFAULT_MODEL_ID, TransformersBackend, format_instruction, process_inputs, compute_logits
+
+HISTORY_FILE = "results/perf_history.jsonl"
+BASELINE_FILE = "results/perf_baseline.json"
+STAGES = ("tokenize", "forward", "postprocess")
+
+# Two-sided 95% critical values of Student's t distribution by degrees of freedom
+T_CRITICAL_95 = {
+    1: 12.706, 2: 4.303, 3: 3.182, 4: 2.776, 5: 2.571, 6: 2.447, 7: 2.365, 8: 2.306, 9: 2.262,
+    10: 2.228, 12: 2.179, 15: 2.131, 20: 2.086, 25: 2.060, 30: 2.042, 40: 2.021, 60: 2.000, 120: 1.980,
+}
+
+SYNTHETIC_WORDS = (
+    "performance latency throughput model query document ranking relevance retrieval index "
+    "search cache memory token batch sequence attention layer kernel thread server request"
+).split()
+
+
+def t_critical(df):
+    """Conservative 95% t critical value (rounds df down to the nearest table entry)"""
+    if df < 1:
+        return float("inf")
+    return T_CRITICAL_95[max(k for k in T_CRITICAL_95 if k <= df)]
+
+
+def mean_ci(values):
+    """Mean and 95% confidence half-width of the mean"""
+    mean = statistics.fmean(values)
+    if len(values) < 2:
+        return mean, float("inf")
+    return mean, t_critical(len(values) - 1) * statistics.stdev(values) / math.sqrt(len(values))
+
+
+def welch_significant(a, b):
+    """True if the means of a and b differ at 95% confidence (Welch's t-test)"""
+    if len(a) < 2 or len(b) < 2:
+        return False
+    var_a, var_b = statistics.variance(a) / len(a), statistics.variance(b) / len(b)
+    if var_a + var_b == 0:
+        return statistics.fmean(a) != statistics.fmean(b)
+    t = abs(statistics.fmean(a) - statistics.fmean(b)) / math.sqrt(var_a + var_b)
+    df = (var_a + var_b) ** 2 / (var_a ** 2 / (len(a) - 1) + var_b ** 2 / (len(b) - 1))
+    return t > t_critical(math.floor(df))
+
+
+def synthetic_cases(count, documents, words):
+    """Deterministic long-document cases"""
+    cases = []
+    for case_idx in range(count):
+        docs = []
+        for doc_idx in range(documents):
+            offset = case_idx * 7 + doc_idx * 3
+            docs.append(" ".join(SYNTHETIC_WORDS[(offset + i * (doc_idx + 1)) % len(SYNTHETIC_WORDS)]
+                                 for i in range(words)))
+        cases.append({
+            "name": f"synthetic_long_{case_idx}",
+            "query": f"{SYNTHETIC_WORDS[case_idx % len(SYNTHETIC_WORDS)]} optimization",
+            "documents": docs
+        })
+    return cases
+
+
+def build_workload(synthetic_count, synthetic_documents, synthetic_words):
+    """Corpus cases with documents plus synthetic long-document cases"""
+    cases = [tc for tc in load_test_cases() if tc["documents"]]
+    cases += synthetic_cases(synthetic_count, synthetic_documents, synthetic_words)
+    fingerprint = hashlib.sha256(json.dumps(
+        [[tc["query"], tc["documents"], tc.get("instruction"), tc.get("top_n")] for tc in cases]
+    ).encode("utf-8")).hexdigest()[:16]
+    return cases, fingerprint
+
+
+def environment_info(model_id, backend):
+    """Describe the environment a run was recorded in"""
+    import numpy
+    import torch
+    import transformers
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "torch": torch.__version__,
+        "transformers": transformers.__version__,
+        "numpy": numpy.__version__,
+        "torch_threads": torch.get_num_threads(),
+        "git_commit": commit,
+        "model_id": model_id,
+        "batch_size": backend.batch_size
+    }
+
+
+def run_workload(backend, cases):
+    """Score every case once, returning per-request latencies and per-stage seconds"""
+    import torch
+
+    info = backend.model_info
+    batch_size = backend.batch_size
+    latencies = []
+    stages = dict.fromkeys(STAGES, 0.0)
+    pairs_scored = 0
+
+    with torch.inference_mode():
+        for test_case in cases:
+            request_start = time.perf_counter()
+            pairs = [format_instruction(test_case.get("instruction"), test_case["query"], doc)
+                     for doc in test_case["documents"]]
+            chunks = []
+            step = batch_size or len(pairs)
+            for start in range(0, len(pairs), step):
+                t0 = time.perf_counter()
+                inputs = process_inputs(pairs[start:start + step], info['tokenizer'], info['prefix_tokens'],
+                                        info['suffix_tokens'], info['max_length'], info['model'])
+                t1 = time.perf_counter()
+                chunks.extend(compute_logits(inputs, info['model'], info['token_true_id'], info['token_false_id']))
+                t2 = time.perf_counter()
+                stages["tokenize"] += t1 - t0
+                stages["forward"] += t2 - t1
+
+            t0 = time.perf_counter()
+            RerankResults.from_scores(chunks, test_case["documents"], top_n=test_case.get("top_n")).to_list()
+            stages["postprocess"] += time.perf_counter() - t0
+
+            latencies.append(time.perf_counter() - request_start)
+            pairs_scored += len(pairs)
+
+    return latencies, stages, pairs_scored
+
+
+def measure(backend, cases, repeats):
+    """Warm up, then run the workload several times"""
+    run_workload(backend, cases)
+
+    runs = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        latencies, stages, pairs = run_workload(backend, cases)
+        wall = time.perf_counter() - start
+        runs.append({
+            "throughput": pairs / wall,
+            "wall_seconds": wall,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "stages": stages
+        })
+    return runs
+
+
+def summarize(runs):
+    """Mean and confidence interval for each tracked value"""
+    summary = {}
+    for key in ("throughput", "p50", "p95", "p99"):
+        mean, ci = mean_ci([r[key] for r in runs])
+        summary[key] = {"mean": mean, "ci95": ci}
+    for stage in STAGES:
+        mean, ci = mean_ci([r["stages"][stage] for r in runs])
+        summary[f"stage_{stage}"] = {"mean": mean, "ci95": ci}
+    return summary
+
+
+def compare(current, baseline, threshold):
+    """Compare a record against the baseline, returning (regressions, report lines)"""
+    regressions = []
+    lines = []
+
+    checks = [("throughput", True), ("p95", False)]
+    for key, higher_is_better in checks:
+        cur = [r[key] for r in current["runs"]]
+        base = [r[key] for r in baseline["runs"]]
+        cur_mean, base_mean = statistics.fmean(cur), statistics.fmean(base)
+        change = (cur_mean - base_mean) / base_mean if base_mean else 0.0
+        worse = -change if higher_is_better else change
+        significant = welch_significant(cur, base)
+        regressed = worse > threshold and significant
+        marker = "❌" if regressed else ("⚠️ " if worse > threshold else "✅")
+        lines.append(f"{marker} {key:<12} baseline {base_mean:10.4f}  current {cur_mean:10.4f}  "
+                     f"({change * 100:+.1f}%, {'significant' if significant else 'within noise'})")
+        if regressed:
+            regressions.append(key)
+
+    lines.append("")
+    lines.append("⏱️  Per-stage time per workload pass (seconds):")
+    for stage in STAGES:
+        cur = current["summary"][f"stage_{stage}"]["mean"]
+        base = baseline["summary"][f"stage_{stage}"]["mean"]
+        change = (cur - base) / base * 100 if base else 0.0
+        lines.append(f"   {stage:<12} baseline {base:8.4f}  current {cur:8.4f}  ({change:+.1f}%)")
+    return regressions, lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reranking performance regression gate")
+    parser.add_argument("--model", default=DEFAULT_MODEL_ID, help="Model id or path")
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--repeats", type=int, default=5, help="Workload runs (at least 2, for the t-test)")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Relative slowdown tolerated (default: 0.10)")
+    parser.add_argument("--synthetic-cases", type=int, default=4)
+    parser.add_argument("--synthetic-documents", type=int, default=8)
+    parser.add_argument("--synthetic-words", type=int, default=512)
+    parser.add_argument("--save-baseline", action="store_true", help="Store this run as the new baseline")
+    parser.add_argument("--history", default=HISTORY_FILE)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    args = parser.parse_args()
+    if args.repeats < 2:
+        parser.error("--repeats must be at least 2 to test significance")
+
+    print("🏁 Reranking Performance Gate")
+    print("=" * 50)
+
+    cases, fingerprint = build_workload(args.synthetic_cases, args.synthetic_documents, args.synthetic_words)
+    print(f"📋 Workload: {len(cases)} cases, {sum(len(tc['documents']) for tc in cases)} pairs ({fingerprint})")
+
+    backend = TransformersBackend(model_id=args.model, batch_size=args.batch_size)
+    runs = measure(backend, cases, args.repeats)
+    record = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "workload": fingerprint,
+        "environment": environment_info(args.model, backend),
+        "runs": runs,
+        "summary": summarize(runs)
+    }
+
+    summary = record["summary"]
+    print(f"🚀 Throughput: {summary['throughput']['mean']:.2f} ± {summary['throughput']['ci95']:.2f} pairs/s")
+    print(f"⏱️  Latency p50/p95/p99: {summary['p50']['mean'] * 1000:.1f} / "
+          f"{summary['p95']['mean'] * 1000:.1f} / {summary['p99']['mean'] * 1000:.1f} ms")
+
+    os.makedirs(os.path.dirname(args.history) or ".", exist_ok=True)
+    with open(args.history, "a") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"💾 Appended to: {args.history}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(record, f, indent=2)
+        print(f"📌 Baseline saved to: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("⚠️  No baseline found; run with --save-baseline first")
+        return 0
+
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+
+    if len(baseline.get("runs", [])) < 2:
+        print(f"❌ Baseline has {len(baseline.get('runs', []))} run(s); significance needs at least 2. "
+              f"Re-record it with --save-baseline --repeats 2 or more")
+        return 1
+
+    if baseline.get("workload") != fingerprint:
+        print("⚠️  Workload differs from the baseline; comparison may not be meaningful")
+    changed = {k: (baseline["environment"].get(k), v) for k, v in record["environment"].items()
+               if k != "git_commit" and baseline["environment"].get(k) != v}
+    for key, (old, new) in changed.items():
+        print(f"⚠️  Environment changed: {key} {old} -> {new}")
+
+    print(f"\n📊 COMPARISON (baseline {baseline['timestamp']}, commit {baseline['environment'].get('git_commit')})")
+    print("=" * 50)
+    regressions, lines = compare(record, baseline, args.threshold)
+    for line in lines:
+        print(line)
+
+    if regressions:
+        print(f"\n❌ Significant performance regression in: {', '.join(regressions)}")
+        return 1
+    print("\n✅ No significant regression")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
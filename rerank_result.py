@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Compact Rerank Results
+======================
+
+Array-backed representation of a ranked result list. Instead of one dict per
+document (holding the document string, the score and a formatted
+raw_response), RerankResults keeps:
+
+    indices - int32 array of original document positions, best first
+    scores  - float32 array of relevance scores, aligned with indices
+    documents - a reference to the caller's document list (never copied)
+
+Iterating yields RerankHit views (__slots__, two references each) that
+behave like the old result dicts (hit["document"], hit.get("raw_response")).
+Dicts and strings are only built by to_list(), i.e. when serializing to the
+API/JSON shape, so existing callers and json.dump(..., default=json_default)
+keep working.
+
+Usage:
+    python rerank_result.py    # compare memory use for 10k results
+"""
+
+import numpy as np
+
+
+class RerankHit:
+    """Lightweight view of one ranked result"""
+
+    __slots__ = ("_results", "_pos")
+
+    _KEYS = ("index", "document", "relevance_score", "raw_response")
+
+    def __init__(self, results, pos):
+        self._results = results
+        self._pos = pos
+
+    @property
+    def index(self):
+        return int(self._results.indices[self._pos])
+
+    @property
+    def relevance_score(self):
+        return float(self._results.scores[self._pos])
+
+    @property
+    def document(self):
+        documents = self._results.documents
+        return documents[self.index] if documents is not None else None
+
+    @property
+    def raw_response(self):
+        return f"{self.relevance_score:.4f}"
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._KEYS
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self._KEYS else default
+
+    def keys(self):
+        return self._KEYS
+
+    def to_dict(self):
+        return {key: getattr(self, key) for key in self._KEYS}
+
+    def __repr__(self):
+        return f"RerankHit(index={self.index}, relevance_score={self.relevance_score:.4f})"
+
+
+class RerankResults:
+    """Ranked results backed by index and score arrays"""
+
+    __slots__ = ("indices", "scores", "documents")
+
+    def __init__(self, indices, scores, documents=None):
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.scores = np.asarray(scores, dtype=np.float32)
+        self.documents = documents
+        if self.indices.shape != self.scores.shape:
+            raise ValueError("indices and scores must have the same shape")
+
+    @classmethod
+    def from_scores(cls, scores, documents=None, top_n=None):
+        """Rank scores given in document order (descending, ties keep input order)"""
+        scores = np.asarray(scores, dtype=np.float32).reshape(-1)
+        order = np.argsort(-scores, kind="stable")
+        if top_n is not None:
+            order = order[:top_n]
+        return cls(order, scores[order], documents)
+
+    @classmethod
+    def from_dicts(cls, results, documents=None):
+        """Build from API-shaped result dicts (e.g. an Ollama response)"""
+        indices = [r.get("index", i) for i, r in enumerate(results)]
+        scores = [r["relevance_score"] for r in results]
+        if documents is None and results and "document" in results[0]:
+            size = max(indices) + 1
+            documents = [None] * size
+            for idx, r in zip(indices, results):
+                documents[idx] = r["document"]
+        return cls(indices, scores, documents)
+
+    @classmethod
+    def empty(cls, documents=None):
+        return cls(np.empty(0, dtype=np.int32), np.empty(0, dtype=np.float32), documents)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __iter__(self):
+        for pos in range(len(self.indices)):
+            yield RerankHit(self, pos)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return RerankResults(self.indices[item], self.scores[item], self.documents)
+        if item < 0:
+            item += len(self.indices)
+        if not 0 <= item < len(self.indices):
+            raise IndexError("result index out of range")
+        return RerankHit(self, item)
+
+    def top(self, n):
+        """Return the best n results"""
+        return self[:n]
+
+    def to_list(self, include_document=True, include_raw_response=True):
+        """Materialize the API/JSON shape: a list of result dicts"""
+        indices = self.indices.tolist()
+        scores = self.scores.tolist()
+        results = []
+        for idx, score in zip(indices, scores):
+            result = {"index": idx}
+            if include_document and self.documents is not None:
+                result["document"] = self.documents[idx]
+            result["relevance_score"] = score
+            if include_raw_response:
+                result["raw_response"] = f"{score:.4f}"
+            results.append(result)
+        return results
+
+    def nbytes(self):
+        """Bytes held by the arrays (documents are shared, not counted)"""
+        return self.indices.nbytes + self.scores.nbytes
+
+    def __repr__(self):
+        return f"RerankResults(n={len(self)})"
+
+
+def json_default(obj):
+    """json.dump default= hook for RerankResults and NumPy scalars/arrays"""
+    if isinstance(obj, RerankResults):
+        return obj.to_list()
+    if isinstance(obj, RerankHit):
+        return obj.to_dict()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def main():
+    """Compare memory use of dict results vs RerankResults for 10k documents"""
+    import tracemalloc
+
+    n = 10_000
+    documents = [f"Document number {i} with some text" for i in range(n)]
+    scores = np.random.default_rng(0).random(n, dtype=np.float32)
+
+    tracemalloc.start()
+    score_list = scores.tolist()
+    results = [
+        {"index": idx, "document": doc, "relevance_score": score, "raw_response": f"{score:.4f}"}
+        for idx, (doc, score) in enumerate(zip(documents, score_list))
+    ]
+    results.sort(key=lambda x: x["relevance_score"], reverse=True)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del results, score_list
+
+    tracemalloc.start()
+    compact = RerankResults.from_scores(scores, documents)
+    compact_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print("📦 Rerank result memory (10k documents, documents shared)")
+    print("=" * 50)
+    print(f"List of dicts:  {dict_bytes / 1024:8.1f} KiB")
+    print(f"RerankResults:  {compact_bytes / 1024:8.1f} KiB ({compact.nbytes()} bytes of arrays)")
+    print(f"Reduction:      {dict_bytes / max(compact_bytes, 1):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+Qwen3-Reranker Library API
+==========================
+
+Importable reranking API so services can embed the official scoring logic
+without copying code out of the test scripts.
+
+    from reranker import Reranker
+
+    reranker = Reranker()                                   # Transformers backend
+    results = reranker.rerank("What is ML?", documents, top_n=3)
+    for hit in results:
+        print(hit.index, hit.relevance_score, hit.document)
+
+    ollama = Reranker("ollama", model_name="qwen_reranker_v2")
+    batch = ollama.rerank_batch([{"query": q, "documents": docs} for q in queries])
+
+    results = await reranker.arerank(query, documents)      # from asyncio code
+
+    from admission import AdmissionController, deadline_in
+    serving = Reranker(admission=AdmissionController(max_concurrency=1, max_queue=8))
+    results = serving.rerank(query, documents, deadline=deadline_in(0.5))
+
+Backends:
+    TransformersBackend - Official Qwen3-Reranker via Transformers. The model,
+                          tokenizer and prefix/suffix tokens stay resident
+    OllamaBackend       - Ollama /api/rerank via the test_ollama.py client
+
+A Reranker is safe to share between threads: the Transformers backend
+serializes access to the model with a lock, and async entry points run
+scoring on a thread pool so the event loop is never blocked.
+
+The scoring primitives (format_instruction, process_inputs, compute_logits)
+live here and are re-exported by test_official.py.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+import numpy as np
+
+import metrics
+from admission import estimate_tokens
+from rerank_result import RerankResults
+
+DEFAULT_MODEL_ID = "Qwen/Qwen3-Reranker-0.6B"
+DEFAULT_INSTRUCTION = "Given a web search query, retrieve relevant passages that answer the query"
+MAX_LENGTH = 8192
+PREFIX = "<|im_start|>system\nJudge whether the Document meets the requirements based on the Query and the Instruct provided. Note that the answer can only be \"yes\" or \"no\".<|im_end|>\n<|im_start|>user\n"
+SUFFIX = "<|im_end|>\n<|im_start|>assistant\n<think>\n\n</think>\n\n"
+
+# Prompt templates matching examples/Qwen3-Reranker-Corrected.Modelfile.
+# Scores are read from the yes/no logits of the last position, so every
+# template must end by asking for a "yes"/"no" answer. The Original Modelfile's
+# numeric "Relevance score (0-10):" prompt cannot be scored this way.
+TEMPLATES = {
+    "corrected": {
+        "prefix": PREFIX,
+        "suffix": SUFFIX,
+        "pair": "<Instruct>: {instruction}\n<Query>: {query}\n<Document>: {doc}"
+    },
+}
+
+
+def load_model_info(model_id=DEFAULT_MODEL_ID, max_length=MAX_LENGTH, dtype=None, template="corrected"):
+    """Load a Qwen3-Reranker model and tokenizer into a model_info dict
+
+    Args:
+        model_id: Hugging Face model id or local path
+        max_length: Max tokens per pair, including the template
+        dtype: Optional torch dtype name ("float16", "bfloat16", ...); default keeps the checkpoint's
+        template: Key of TEMPLATES
+
+    Raises on failure; the scripts load models through model_registry.ModelRegistry
+    (see test_official.load_registry for the (registry, error) tuple form).
+    """
+    from transformers import AutoTokenizer, AutoModelForCausalLM
+
+    if template not in TEMPLATES:
+        raise ValueError(f"Unknown template '{template}', expected one of {sorted(TEMPLATES)}")
+
+    model_kwargs = {}
+    if dtype is not None:
+        import torch
+        model_kwargs["torch_dtype"] = getattr(torch, dtype)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_id, padding_side='left')
+    model = AutoModelForCausalLM.from_pretrained(model_id, **model_kwargs).eval()
+
+    return {
+        'tokenizer': tokenizer,
+        'model': model,
+        'token_false_id': tokenizer.convert_tokens_to_ids("no"),
+        'token_true_id': tokenizer.convert_tokens_to_ids("yes"),
+        'max_length': max_length,
+        'template': template,
+        'prefix_tokens': tokenizer.encode(TEMPLATES[template]["prefix"], add_special_tokens=False),
+        'suffix_tokens': tokenizer.encode(TEMPLATES[template]["suffix"], add_special_tokens=False)
+    }
+
+
+def format_instruction(instruction, query, doc, template="corrected"):
+    """Format instruction for the model"""
+    if instruction is None:
+        instruction = DEFAULT_INSTRUCTION
+    output = TEMPLATES[template]["pair"].format(
+        instruction=instruction, query=query, doc=doc
+    )
+    return output
+
+
+def process_inputs(pairs, tokenizer, prefix_tokens, suffix_tokens, max_length, model):
+    """Process inputs for the model"""
+    inputs = tokenizer(
+        pairs, padding=False, truncation='longest_first',
+        return_attention_mask=False, max_length=max_length - len(prefix_tokens) - len(suffix_tokens)
+    )
+    for i, ele in enumerate(inputs['input_ids']):
+        inputs['input_ids'][i] = prefix_tokens + ele + suffix_tokens
+
+    # Record sequence lengths and padding waste before padding the batch
+    lengths = [len(ids) for ids in inputs['input_ids']]
+    if lengths:
+        metrics.SEQUENCE_LENGTH.observe_many(lengths, backend="transformers")
+        metrics.TOKENS.inc(sum(lengths), backend="transformers")
+        metrics.PADDING_RATIO.observe(1 - sum(lengths) / (max(lengths) * len(lengths)), backend="transformers")
+
+    inputs = tokenizer.pad(inputs, padding=True, return_tensors="pt", max_length=max_length)
+    for key in inputs:
+        inputs[key] = inputs[key].to(model.device)
+    return inputs
+
+
+def compute_logits(inputs, model, token_true_id, token_false_id, **kwargs):
+    """Compute logits and convert to probabilities"""
+    import torch
+
+    batch_scores = model(**inputs).logits[:, -1, :]
+    true_vector = batch_scores[:, token_true_id]
+    false_vector = batch_scores[:, token_false_id]
+    batch_scores = torch.stack([false_vector, true_vector], dim=1)
+    batch_scores = torch.nn.functional.log_softmax(batch_scores, dim=1)
+    # Keep scores as a float32 array; Python floats are only built on serialization
+    scores = batch_scores[:, 1].exp().detach().float().cpu().numpy()
+    return scores
+
+
+class TransformersBackend:
+    """Official Qwen3-Reranker scoring with a resident model"""
+
+    name = "transformers"
+
+    def __init__(self, model_id=DEFAULT_MODEL_ID, model_info=None, batch_size=None, max_length=MAX_LENGTH,
+                 use_profile=True, dtype=None, template="corrected", compile_mode=None, shape_buckets=None):
+        """
+        Args:
+            model_id: Hugging Face model id (ignored if model_info is given)
+            model_info: Pre-loaded dict from load_model_info()
+            batch_size: Max pairs per forward pass (None = tuned profile, else all pairs at once)
+            max_length: Max tokens per pair, including the template
+            use_profile: Apply the tuned profile written by autotune.py, if any
+            dtype: Optional torch dtype name for the weights (ignored if model_info is given)
+            template: Prompt template, a key of TEMPLATES (ignored if model_info is given)
+            compile_mode: None for eager, or "compile" / "trace" to precompile shape buckets (see compiled.py)
+            shape_buckets: (batch_buckets, seq_buckets) for compile_mode (default: compiled.py defaults)
+        """
+        from autotune import load_profile, apply_profile_once
+
+        self.profile = load_profile() if use_profile else None
+        apply_profile_once(self.profile)
+        if batch_size is None and self.profile:
+            batch_size = self.profile.get("batch_size")
+
+        self.model_id = model_id
+        if model_info is None:
+            model_info = load_model_info(model_id, max_length, dtype=dtype, template=template)
+        if compile_mode:
+            from compiled import DEFAULT_BATCH_BUCKETS, DEFAULT_SEQ_BUCKETS, enable_compiled
+            batch_buckets, seq_buckets = shape_buckets or (DEFAULT_BATCH_BUCKETS, DEFAULT_SEQ_BUCKETS)
+            model_info = enable_compiled(model_info, compile_mode, batch_buckets, seq_buckets)
+            report = model_info['model'].startup_report()
+            print(f"⚙️  Compiled {report['compiled']}/{report['buckets']} shape buckets "
+                  f"({compile_mode}) in {report['total_seconds']:.1f}s")
+        self.model_info = model_info
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+
+    def score_pairs(self, pairs, max_length=None):
+        """Score pre-formatted pairs, returning a float32 array in input order"""
+        import torch
+
+        info = self.model_info
+        if max_length is None:
+            max_length = info['max_length']
+        batch_size = self.batch_size or len(pairs) or 1
+
+        chunks = []
+        with self._lock, torch.inference_mode():
+            for start in range(0, len(pairs), batch_size):
+                batch = pairs[start:start + batch_size]
+                inputs = process_inputs(batch, info['tokenizer'], info['prefix_tokens'],
+                                        info['suffix_tokens'], max_length, info['model'])
+                chunks.append(compute_logits(inputs, info['model'], info['token_true_id'], info['token_false_id']))
+                metrics.BATCH_SIZE.observe(len(batch), backend=self.name)
+        if not chunks:
+            return np.empty(0, dtype=np.float32)
+        return np.concatenate(chunks)
+
+    def score(self, query, documents, instruction=None, max_length=None, timeout=None):
+        """Score documents against a query, returning a float32 array in document order
+
+        timeout is accepted for interface parity; local scoring cannot be interrupted.
+        """
+        return self.score_many([(query, documents, instruction)], max_length=max_length)[0]
+
+    def score_many(self, requests, max_length=None):
+        """Score several (query, documents, instruction) requests in shared batches"""
+        template = self.model_info.get('template', "corrected")
+        pairs = []
+        bounds = []
+        for query, documents, instruction in requests:
+            start = len(pairs)
+            pairs.extend(format_instruction(instruction, query, doc, template) for doc in documents)
+            bounds.append((start, len(pairs)))
+
+        metrics.REQUESTS.inc(len(requests), backend=self.name)
+        start_time = time.time()
+        try:
+            scores = self.score_pairs(pairs, max_length=max_length)
+        except Exception:
+            metrics.ERRORS.inc(len(requests), backend=self.name)
+            raise
+        metrics.LATENCY.observe(time.time() - start_time, backend=self.name)
+        metrics.PAIRS.inc(len(pairs), backend=self.name)
+        return [scores[start:end] for start, end in bounds]
+
+
+class OllamaBackend:
+    """Scoring through Ollama's /api/rerank endpoint"""
+
+    name = "ollama"
+
+    def __init__(self, model_name=None, timeout=10, shard_size=None, max_workers=None, retries=None):
+        from test_ollama import get_model_name
+
+        self.model_name = model_name or get_model_name()
+        self.timeout = timeout
+        self.shard_options = {"shard_size": shard_size, "max_workers": max_workers, "retries": retries}
+
+    def score(self, query, documents, instruction=None, max_length=None, timeout=None):
+        """Score documents against a query, returning a float32 array in document order
+
+        max_length truncates documents client-side (approximately, by characters)
+        since the server's context length cannot be set per request. timeout
+        bounds the whole call, retries and queued shards included.
+        """
+        from test_ollama import test_ollama_reranker
+
+        if max_length is not None:
+            max_chars = max(1, max_length - 64) * 4
+            documents = [doc[:max_chars] for doc in documents]
+        test_case = {"model": self.model_name, "query": query, "documents": documents}
+        if instruction is not None:
+            test_case["instruction"] = instruction
+        deadline = None if timeout is None else time.monotonic() + timeout
+        result = test_ollama_reranker(test_case, timeout=self.timeout, deadline=deadline, **self.shard_options)
+        if not result["success"]:
+            raise RuntimeError(result["error"])
+
+        scores = np.zeros(len(documents), dtype=np.float32)
+        for position, item in enumerate(result["results"]):
+            scores[item.get("index", position)] = item["relevance_score"]
+        return scores
+
+    def score_many(self, requests, max_length=None):
+        """Score several (query, documents, instruction) requests one by one"""
+        return [self.score(query, documents, instruction, max_length=max_length)
+                for query, documents, instruction in requests]
+
+
+BACKENDS = {
+    "transformers": TransformersBackend,
+    "ollama": OllamaBackend,
+}
+
+
+class Reranker:
+    """Reranker with pluggable backends and sync/async entry points"""
+
+    def __init__(self, backend="transformers", max_workers=4, admission=None, shadow=None, **backend_options):
+        """
+        Args:
+            backend: Backend name ("transformers", "ollama") or a backend instance
+            max_workers: Threads used by the async entry points
+            admission: Optional admission.AdmissionController for deadline-aware
+                       queueing and degradation in rerank()/arerank()
+            shadow: Optional shadow.ShadowScorer that re-scores a sample of
+                    undegraded rerank() requests on a second backend
+            **backend_options: Passed to the backend constructor when a name is given
+        """
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown backend '{backend}', expected one of {sorted(BACKENDS)}")
+            backend = BACKENDS[backend](**backend_options)
+        self.backend = backend
+        self.admission = admission
+        self.shadow = shadow
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="reranker")
+
+    def rerank(self, query, documents, instruction=None, top_n=None, deadline=None):
+        """Rerank documents for a query, returning RerankResults (best first)
+
+        deadline is an absolute time.monotonic() value (see admission.deadline_in).
+        With an admission controller, the request may be degraded to meet it or
+        shed with admission.OverloadedError.
+        """
+        if not documents:
+            return RerankResults.empty(documents)
+
+        if self.admission is None:
+            timeout = None if deadline is None else max(0.001, deadline - time.monotonic())
+            start_time = time.monotonic()
+            scores = self.backend.score(query, documents, instruction, timeout=timeout)
+            ranked = RerankResults.from_scores(scores, documents)
+            if self.shadow is not None:
+                self.shadow.submit(query, documents, instruction, ranked, time.monotonic() - start_time)
+            return ranked[:top_n] if top_n is not None else ranked
+
+        with self.admission.admit(documents, deadline) as step:
+            candidates = documents[:step["max_candidates"]] if "max_candidates" in step else documents
+            timeout = None if deadline is None else max(0.001, deadline - time.monotonic())
+            start_time = time.monotonic()
+            scores = self.backend.score(query, candidates, instruction,
+                                        max_length=step.get("max_length"), timeout=timeout)
+            elapsed = time.monotonic() - start_time
+            token_counts = [estimate_tokens(doc) for doc in candidates]
+            self.admission.observe(elapsed, self.admission.effective_tokens(token_counts, step))
+
+        ranked = RerankResults.from_scores(scores, documents)
+        if self.shadow is not None and step is self.admission.ladder[0]:
+            # Degraded requests would show drift the backends do not have
+            self.shadow.submit(query, documents, instruction, ranked, elapsed)
+        if len(candidates) < len(documents):
+            # Unscored candidates keep their input order after every scored one
+            unscored = np.arange(len(candidates), len(documents), dtype=np.int32)
+            ranked = RerankResults(np.concatenate([ranked.indices, unscored]),
+                                   np.concatenate([ranked.scores, np.zeros(len(unscored), dtype=np.float32)]),
+                                   documents)
+        return ranked[:top_n] if top_n is not None else ranked
+
+    def rerank_batch(self, requests):
+        """Rerank several requests; each is a dict with query, documents and optional instruction/top_n
+
+        Batch jobs bypass admission control.
+        """
+        scores = self.backend.score_many([
+            (request["query"], request["documents"], request.get("instruction"))
+            for request in requests
+        ])
+        return [
+            RerankResults.from_scores(request_scores, request["documents"], top_n=request.get("top_n"))
+            for request, request_scores in zip(requests, scores)
+        ]
+
+    async def arerank(self, query, documents, instruction=None, top_n=None, deadline=None):
+        """Async rerank; scoring runs on the executor so the event loop stays free"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            partial(self.rerank, query, documents, instruction=instruction, top_n=top_n, deadline=deadline)
+        )
+
+    async def arerank_batch(self, requests):
+        """Async rerank_batch"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(self.rerank_batch, requests))
+
+    def close(self):
+        """Shut down the async executor and the shadow scorer"""
+        self._executor.shutdown(wait=True)
+        if self.shadow is not None:
+            self.shadow.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
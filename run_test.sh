@@ -4,6 +4,21 @@
 echo "🚀 Qwen3-Reranker Comparison Test"
 echo "================================="
 
+# Ollama endpoint (point at mock_ollama.py for load testing without a daemon).
+# OLLAMA_HOST is read as Ollama reads it: a bare host[:port] defaults to port 11434.
+OLLAMA_URL="${OLLAMA_HOST:-127.0.0.1:11434}"
+OLLAMA_URL="${OLLAMA_URL%/}"
+case "$OLLAMA_URL" in
+    http://*|https://*) ;;
+    *)
+        case "$OLLAMA_URL" in
+            *:*) ;;
+            *) OLLAMA_URL="$OLLAMA_URL:11434" ;;
+        esac
+        OLLAMA_URL="http://$OLLAMA_URL"
+        ;;
+esac
+
 # Check if Python is available
 if ! command -v python3 &> /dev/null; then
     echo "❌ Python3 not found. Please install Python 3.7+"
@@ -11,14 +26,14 @@ if ! command -v python3 &> /dev/null; then
 fi
 
 # Check if Ollama is running
-if ! curl -s http://localhost:11434/api/tags > /dev/null 2>&1; then
+if ! curl -s "$OLLAMA_URL/api/tags" > /dev/null 2>&1; then
     echo "❌ Ollama not running. Please start Ollama first:"
     echo "   OLLAMA_NEW_ENGINE=1 ollama serve"
     exit 1
 fi
 
 # Check if qwen_reranker_v2 model exists
-if ! curl -s http://localhost:11434/api/show -d '{"name":"qwen_reranker_v2"}' 2>/dev/null | grep -q "qwen_reranker_v2"; then
+if ! curl -s "$OLLAMA_URL/api/show" -d '{"name":"qwen_reranker_v2"}' 2>/dev/null | grep -q "qwen_reranker_v2"; then
     echo "❌ qwen_reranker_v2 model not found. Please create it first:"
     echo "   ./ollama create qwen_reranker_v2 -f Modelfile"
     exit 1
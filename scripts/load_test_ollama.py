@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Load test the Ollama rerank client
+==================================
+
+Replays the test corpus through test_ollama.test_ollama_reranker from many
+threads and reports throughput and latency percentiles. With --mock, a
+deterministic mock_ollama.py server is started in-process, so results are
+reproducible with no model and no network.
+
+Usage:
+    python scripts/load_test_ollama.py --mock --concurrency 8 --requests 200
+    OLLAMA_HOST=http://localhost:11434 python scripts/load_test_ollama.py
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus import load_test_cases
+from metrics import percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the Ollama rerank client")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--mock", action="store_true", help="Start an in-process mock Ollama server")
+    parser.add_argument("--latency", default="lognormal:0.02:0.5", help="Mock latency spec")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Mock error rate")
+    parser.add_argument("--max-concurrency", type=int, default=0, help="Mock concurrency limit")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.mock:
+        from mock_ollama import start_in_background
+        server, url = start_in_background(port=0, latency=args.latency, error_rate=args.error_rate,
+                                          max_concurrency=args.max_concurrency, seed=args.seed)
+        os.environ["OLLAMA_HOST"] = url
+        print(f"🧪 Mock Ollama started on {url}")
+
+    from test_ollama import test_ollama_reranker
+
+    # Expected failures would skew latency numbers, so only replay normal cases
+    test_cases = [tc for tc in load_test_cases(expected_to_fail=False) if tc["documents"]]
+    if not test_cases:
+        print("❌ No test cases with documents found")
+        return 1
+    workload = [test_cases[i % len(test_cases)] for i in range(args.requests)]
+
+    print(f"🚀 Sending {len(workload)} requests with concurrency {args.concurrency}")
+    start_time = time.time()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        results = list(pool.map(test_ollama_reranker, workload))
+    elapsed = time.time() - start_time
+
+    latencies = [r["time"] for r in results if r["success"]]
+    failures = sum(1 for r in results if not r["success"])
+
+    print("\n📊 LOAD TEST SUMMARY")
+    print("=" * 40)
+    print(f"Requests: {len(results)} ({failures} failed)")
+    print(f"Wall time: {elapsed:.3f}s")
+    print(f"Throughput: {len(results) / elapsed:.1f} req/s")
+    for pct in (50, 90, 95, 99):
+        print(f"p{pct}: {percentile(latencies, pct) * 1000:.1f} ms")
+
+    if server is not None:
+        print(f"Mock stats: {server.state.stats}")
+        server.shutdown()
+    return 0 if failures == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,9 +7,16 @@ Test ambiguous cases with the real Qwen3-Reranker using Transformers.
 This provides the ground truth for comparison with Ollama's implementation.
 """
 
+import os
+import sys
 import torch
 from transformers import AutoModel, AutoTokenizer, AutoModelForCausalLM
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus import load_shard
+
+AMBIGUOUS_CASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "ambiguous.jsonl")
+
 def format_instruction(instruction, query, doc):
     if instruction is None:
         instruction = 'Given a web search query, retrieve relevant passages that answer the query'
@@ -57,53 +64,8 @@ def test_ambiguous_cases():
     
     print("✅ Model loaded successfully!")
     
-    # Define ambiguous test cases
-    test_cases = [
-        {
-            "name": "Ambiguous Technology Query",
-            "query": "How to improve software performance?",
-            "documents": [
-                "Optimize database queries for faster execution.",
-                "Use caching mechanisms to reduce load times.",
-                "Upgrade hardware components like RAM and CPU.",
-                "Write efficient algorithms and data structures.",
-                "Clean your computer screen regularly."
-            ]
-        },
-        {
-            "name": "Partial Relevance",
-            "query": "Best restaurants in Paris",
-            "documents": [
-                "Paris has many excellent bistros and cafes.",
-                "French cuisine is known for its sophistication.",
-                "Booking tables in advance is recommended.",
-                "Le Bernardin is a famous French restaurant in New York.",
-                "The Eiffel Tower is a popular tourist attraction."
-            ]
-        },
-        {
-            "name": "Subtle Differences",
-            "query": "Climate change effects",
-            "documents": [
-                "Global warming is causing ice caps to melt.",
-                "Weather patterns are becoming more unpredictable.",
-                "Rising sea levels threaten coastal cities.",
-                "Environmental protection is important for future generations.",
-                "My cat likes to sleep in the sun."
-            ]
-        },
-        {
-            "name": "Technical Ambiguity",
-            "query": "Machine learning optimization",
-            "documents": [
-                "Gradient descent is an optimization algorithm.",
-                "Hyperparameter tuning improves model performance.",
-                "Neural networks require careful tuning.",
-                "Coffee helps programmers stay awake.",
-                "Deep learning models need large datasets."
-            ]
-        }
-    ]
+    # Load ambiguous test cases from the shared corpus
+    test_cases = load_shard(AMBIGUOUS_CASES)
     
     task = 'Given a web search query, retrieve relevant passages that answer the query'
     
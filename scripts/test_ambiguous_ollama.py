@@ -4,64 +4,27 @@ Test ambiguous/uncertain cases with Ollama
 """
 
 import json
+import os
+import sys
 import requests
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from corpus import load_shard
+from test_ollama import get_ollama_url
+
+AMBIGUOUS_CASES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tests", "ambiguous.jsonl")
+
 def test_ambiguous_ollama():
     """Test ambiguous cases with Ollama"""
     
-    # Test cases with varying degrees of relevance
-    test_cases = [
-        {
-            "name": "Ambiguous Technology Query",
-            "query": "How to improve software performance?",
-            "documents": [
-                "Optimize database queries for faster execution.",
-                "Use caching mechanisms to reduce load times.",
-                "Clean your computer screen regularly.",
-                "Upgrade hardware components like RAM and CPU.",
-                "Write efficient algorithms and data structures."
-            ]
-        },
-        {
-            "name": "Partial Relevance",
-            "query": "Best restaurants in Paris",
-            "documents": [
-                "Le Bernardin is a famous French restaurant in New York.",
-                "Paris has many excellent bistros and cafes.",
-                "The Eiffel Tower is a popular tourist attraction.",
-                "French cuisine is known for its sophistication.",
-                "Booking tables in advance is recommended."
-            ]
-        },
-        {
-            "name": "Subtle Differences",
-            "query": "Climate change effects",
-            "documents": [
-                "Global warming is causing ice caps to melt.",
-                "Weather patterns are becoming more unpredictable.",
-                "My cat likes to sleep in the sun.",
-                "Rising sea levels threaten coastal cities.",
-                "Environmental protection is important for future generations."
-            ]
-        },
-        {
-            "name": "Technical Ambiguity",
-            "query": "Machine learning optimization",
-            "documents": [
-                "Gradient descent is an optimization algorithm.",
-                "Neural networks require careful tuning.",
-                "Coffee helps programmers stay awake.",
-                "Deep learning models need large datasets.",
-                "Hyperparameter tuning improves model performance."
-            ]
-        }
-    ]
+    # Test cases with varying degrees of relevance, shared with the official script
+    test_cases = load_shard(AMBIGUOUS_CASES)
     
     print("🧪 AMBIGUOUS CASE TESTING - OLLAMA")
     print("=" * 60)
     
-    url = "http://localhost:11434/api/rerank"
+    url = get_ollama_url() + "/api/rerank"
     
     for test_case in test_cases:
         print(f"\n🔍 {test_case['name']}")
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Sampled Shadow Scoring
+======================
+
+Continuous drift monitoring between two backends. The project began by
+finding that Ollama's scores diverged from the official implementation, and
+compare_results.py only catches that in a one-off offline run. In shadow
+mode, a configurable fraction of live rerank requests is scored again on a
+second backend. The comparison uses the same compare_results() logic.
+
+Shadow scoring is kept off the request's critical path:
+- Sampled requests go on a bounded queue. When the queue is full, the sample
+  is dropped (and counted) instead of blocking the caller.
+- A single background thread scores them on the shadow backend.
+- Only undegraded requests are sampled, since truncated or cut-down requests
+  would report drift the backends do not have.
+
+Agreement over the last `window` comparisons is kept in memory (report()) and
+exported through metrics.py:
+    reranker_shadow_requests_total{outcome=compared|error|dropped}
+    reranker_shadow_ranking_match_ratio
+    reranker_shadow_score_similarity
+
+Usage:
+    shadow = ShadowScorer("ollama", sample_rate=0.05)
+    reranker = Reranker("transformers", shadow=shadow)
+    ...
+    print(shadow.report())
+
+Environment Variables:
+    RERANKER_SHADOW_RATE: Default fraction of requests to shadow-score (default: 0.01)
+"""
+
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+
+import metrics
+from compare_results import compare_results
+from rerank_result import RerankResults
+from reranker import BACKENDS
+
+SHADOW_REQUESTS = metrics.REGISTRY.counter(
+    "reranker_shadow_requests_total", "Shadow-scoring samples by outcome", ["outcome"])
+RANKING_MATCH_RATIO = metrics.REGISTRY.gauge(
+    "reranker_shadow_ranking_match_ratio", "Rolling fraction of shadowed requests with identical rankings")
+SCORE_SIMILARITY = metrics.REGISTRY.gauge(
+    "reranker_shadow_score_similarity", "Rolling mean score similarity between primary and shadow backends")
+
+
+def get_sample_rate():
+    """Get shadow sample rate from environment variable or use default"""
+    return float(os.getenv("RERANKER_SHADOW_RATE", "0.01"))
+
+
+class ShadowScorer:
+    """Re-scores a sample of requests on a second backend in the background"""
+
+    def __init__(self, backend="ollama", sample_rate=None, max_queue=64, window=200,
+                 max_mismatches=10, seed=None, **backend_options):
+        """
+        Args:
+            backend: Shadow backend name ("transformers", "ollama") or a backend instance
+            sample_rate: Fraction of requests to shadow (default: RERANKER_SHADOW_RATE or 0.01)
+            max_queue: Samples allowed to wait for the shadow backend before new ones are dropped
+            window: Number of recent comparisons the agreement metrics are computed over
+            max_mismatches: Recent ranking mismatches kept for inspection
+            seed: Optional seed for reproducible sampling
+            **backend_options: Passed to the backend constructor when a name is given
+        """
+        if isinstance(backend, str):
+            if backend not in BACKENDS:
+                raise ValueError(f"Unknown backend '{backend}', expected one of {sorted(BACKENDS)}")
+            backend = BACKENDS[backend](**backend_options)
+        self.backend = backend
+        self.sample_rate = get_sample_rate() if sample_rate is None else sample_rate
+        self._random = random.Random(seed)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._comparisons = deque(maxlen=window)
+        self._mismatches = deque(maxlen=max_mismatches)
+        self._counts = {"sampled": 0, "compared": 0, "error": 0, "dropped": 0}
+        self._worker = threading.Thread(target=self._run, name="reranker-shadow", daemon=True)
+        self._worker.start()
+
+    def submit(self, query, documents, instruction, primary_results, primary_time):
+        """Maybe queue a served request for shadow scoring; never blocks
+
+        primary_results must be the full ranking (before top_n). Returns True
+        if the request was queued.
+        """
+        if not documents or self._random.random() >= self.sample_rate:
+            return False
+        with self._lock:
+            self._counts["sampled"] += 1
+        try:
+            self._queue.put_nowait((query, documents, instruction, primary_results, primary_time))
+        except queue.Full:
+            with self._lock:
+                self._counts["dropped"] += 1
+            SHADOW_REQUESTS.inc(outcome="dropped")
+            return False
+        metrics.QUEUE_DEPTH.set(self._queue.qsize(), queue="shadow")
+        return True
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                self._compare(*item)
+            except Exception as e:
+                # One bad sample must not stop drift monitoring
+                with self._lock:
+                    self._counts["error"] += 1
+                SHADOW_REQUESTS.inc(outcome="error")
+                print(f"⚠️  Shadow comparison failed: {e}")
+            finally:
+                metrics.QUEUE_DEPTH.set(self._queue.qsize(), queue="shadow")
+                self._queue.task_done()
+
+    def _compare(self, query, documents, instruction, primary_results, primary_time):
+        primary = {"success": True, "results": primary_results, "time": primary_time}
+        start_time = time.time()
+        try:
+            scores = self.backend.score(query, documents, instruction)
+            shadow = {"success": True, "results": RerankResults.from_scores(scores, documents),
+                      "time": time.time() - start_time}
+        except Exception as e:
+            shadow = {"success": False, "error": str(e), "time": time.time() - start_time}
+
+        comparison = compare_results(primary, shadow)
+        outcome = "compared" if shadow["success"] else "error"
+        with self._lock:
+            self._counts[outcome] += 1
+            if shadow["success"]:
+                self._comparisons.append(comparison)
+                if not comparison["ranking_match"]:
+                    self._mismatches.append({"query": query, "comparison": comparison})
+            match_ratio, similarity = self._agreement()
+        SHADOW_REQUESTS.inc(outcome=outcome)
+        if match_ratio is not None:
+            RANKING_MATCH_RATIO.set(match_ratio)
+            SCORE_SIMILARITY.set(similarity)
+
+    def _agreement(self):
+        """Rolling ranking match ratio and mean score similarity (lock held)"""
+        if not self._comparisons:
+            return None, None
+        total = len(self._comparisons)
+        matches = sum(1 for c in self._comparisons if c["ranking_match"])
+        similarity = sum(c["score_similarity"] for c in self._comparisons) / total
+        return matches / total, similarity
+
+    def drain(self):
+        """Block until every queued sample has been compared"""
+        self._queue.join()
+
+    def report(self):
+        """Rolling agreement, sample counts and recent ranking mismatches"""
+        with self._lock:
+            match_ratio, similarity = self._agreement()
+            return {
+                "backend": getattr(self.backend, "name", type(self.backend).__name__),
+                "sample_rate": self.sample_rate,
+                "window": len(self._comparisons),
+                "ranking_match_ratio": match_ratio,
+                "score_similarity": similarity,
+                "counts": dict(self._counts),
+                "queue_depth": self._queue.qsize(),
+                "recent_mismatches": list(self._mismatches)
+            }
+
+    def close(self):
+        """Finish queued samples and stop the worker thread"""
+        if self._worker.is_alive():
+            self._queue.put(None)
+            self._worker.join()
@@ -6,6 +6,8 @@ Show current model configuration
 import os
 from dotenv import load_dotenv
 
+from autotune import get_profile_path, load_profile, detect_host
+
 # Load environment variables
 load_dotenv()
 
@@ -17,6 +19,22 @@ def main():
     model_name = os.getenv("MODEL_NAME", "qwen_reranker_v2")
     print(f"Model Name: {model_name}")
     
+    # Show the tuned CPU profile used by the Transformers scorer
+    profile_path = get_profile_path()
+    profile = load_profile(profile_path)
+    if profile:
+        print(f"Tuned Profile: {profile_path} (created {profile.get('created', 'unknown')})")
+        print(f"   threads={profile.get('threads')} batch_size={profile.get('batch_size')} "
+              f"processes={profile.get('processes')}")
+        print(f"   {profile.get('throughput', 0):.2f} pairs/s, p95 {profile.get('p95_latency_ms', 0):.1f} ms "
+              f"(SLO {profile.get('latency_slo_ms', 0):.0f} ms)")
+        host = detect_host()
+        tuned_host = profile.get("host", {})
+        if (tuned_host.get("logical_cpus"), tuned_host.get("physical_cores")) != (host["logical_cpus"], host["physical_cores"]):
+            print("⚠️  Profile was tuned on a different host; consider re-running autotune.py")
+    else:
+        print("Tuned Profile: none (library defaults; run autotune.py to create one)")
+    
     # Check if .env file exists
     if os.path.exists(".env"):
         print("✅ .env file found")
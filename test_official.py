@@ -7,116 +7,80 @@ Tests the actual official Qwen3-Reranker model using Transformers library
 import json
 import time
 import os
-import glob
-import torch
-from transformers import AutoModel, AutoTokenizer, AutoModelForCausalLM
-import numpy as np
 
-def load_test_cases():
-    """Load test cases from JSON files in tests/ directory"""
-    test_cases = []
-    test_files = glob.glob("tests/test_*.json")
-    
-    for test_file in sorted(test_files):
-        try:
-            with open(test_file, 'r') as f:
-                test_data = json.load(f)
-                
-            # Extract test case name from filename
-            test_name = os.path.splitext(os.path.basename(test_file))[0]
-            
-            # Create test case structure
-            test_case = {
-                "name": test_name,
-                "file": test_file,
-                "query": test_data.get("query", ""),
-                "documents": test_data.get("documents", [])
-            }
-            
-            # Add optional parameters if present
-            if "instruction" in test_data:
-                test_case["instruction"] = test_data["instruction"]
-            if "top_n" in test_data:
-                test_case["top_n"] = test_data["top_n"]
-            if "model" in test_data:
-                test_case["model"] = test_data["model"]
-                
-            test_cases.append(test_case)
-            
-        except Exception as e:
-            print(f"⚠️  Warning: Could not load {test_file}: {e}")
-    
-    return test_cases
+import metrics
+from autotune import load_profile, apply_profile_once
+from corpus import load_test_cases
+from model_registry import ModelRegistry
+from rerank_result import RerankResults, json_default
+# Scoring primitives live in reranker.py; re-exported here for existing callers
+from reranker import (DEFAULT_MODEL_ID, DEFAULT_INSTRUCTION, load_model_info,
+                      format_instruction, process_inputs, compute_logits)
 
-def load_real_model():
-    """Load real Qwen3-Reranker model using Transformers"""
+def load_registry():
+    """Create the model registry and load the default model"""
     try:
+        # Apply the tuned CPU profile (autotune.py) before any model is loaded
+        apply_profile_once(load_profile())
+        registry = ModelRegistry()
         print("📦 Loading real Qwen3-Reranker model...")
-        tokenizer = AutoTokenizer.from_pretrained("Qwen/Qwen3-Reranker-0.6B", padding_side='left')
-        model = AutoModelForCausalLM.from_pretrained("Qwen/Qwen3-Reranker-0.6B").eval()
-        
-        # Get token IDs for yes/no
-        token_false_id = tokenizer.convert_tokens_to_ids("no")
-        token_true_id = tokenizer.convert_tokens_to_ids("yes")
-        
-        # Setup template tokens
-        max_length = 8192
-        prefix = "<|im_start|>system\nJudge whether the Document meets the requirements based on the Query and the Instruct provided. Note that the answer can only be \"yes\" or \"no\".<|im_end|>\n<|im_start|>user\n"
-        suffix = "<|im_end|>\n<|im_start|>assistant\n<think>\n\n</think>\n\n"
-        prefix_tokens = tokenizer.encode(prefix, add_special_tokens=False)
-        suffix_tokens = tokenizer.encode(suffix, add_special_tokens=False)
-        
-        return {
-            'tokenizer': tokenizer,
-            'model': model,
-            'token_false_id': token_false_id,
-            'token_true_id': token_true_id,
-            'max_length': max_length,
-            'prefix_tokens': prefix_tokens,
-            'suffix_tokens': suffix_tokens
-        }, None
+        registry.get()
+        return registry, None
         
     except Exception as e:
         return None, str(e)
 
-def format_instruction(instruction, query, doc):
-    """Format instruction for the model"""
-    if instruction is None:
-        instruction = 'Given a web search query, retrieve relevant passages that answer the query'
-    output = "<Instruct>: {instruction}\n<Query>: {query}\n<Document>: {doc}".format(
-        instruction=instruction, query=query, doc=doc
-    )
-    return output
+def test_official_routed(test_case, registry):
+    """Test real Qwen3-Reranker, routed to the model named in the test case"""
+    try:
+        backend = registry.get(test_case.get("model"))
+    except Exception as e:
+        # Unknown models fail fast without touching the loaded ones
+        metrics.ERRORS.inc(backend="transformers")
+        return {
+            "success": False,
+            "results": [],
+            "time": 0,
+            "error": str(e)
+        }
 
-def process_inputs(pairs, tokenizer, prefix_tokens, suffix_tokens, max_length, model):
-    """Process inputs for the model"""
-    inputs = tokenizer(
-        pairs, padding=False, truncation='longest_first',
-        return_attention_mask=False, max_length=max_length - len(prefix_tokens) - len(suffix_tokens)
-    )
-    for i, ele in enumerate(inputs['input_ids']):
-        inputs['input_ids'][i] = prefix_tokens + ele + suffix_tokens
-    inputs = tokenizer.pad(inputs, padding=True, return_tensors="pt", max_length=max_length)
-    for key in inputs:
-        inputs[key] = inputs[key].to(model.device)
-    return inputs
+    documents = test_case["documents"]
+    if not documents:
+        metrics.REQUESTS.inc(backend="transformers")
+        return {
+            "success": True,
+            "results": [],
+            "time": 0,
+            "error": None
+        }
 
-def compute_logits(inputs, model, token_true_id, token_false_id, **kwargs):
-    """Compute logits and convert to probabilities"""
-    batch_scores = model(**inputs).logits[:, -1, :]
-    true_vector = batch_scores[:, token_true_id]
-    false_vector = batch_scores[:, token_false_id]
-    batch_scores = torch.stack([false_vector, true_vector], dim=1)
-    batch_scores = torch.nn.functional.log_softmax(batch_scores, dim=1)
-    scores = batch_scores[:, 1].exp().tolist()
-    return scores
+    try:
+        # The backend records request metrics and scores under its lock in
+        # chunks of its tuned batch_size
+        start_time = time.time()
+        scores = backend.score(test_case["query"], documents, test_case.get("instruction"))
+        elapsed = time.time() - start_time
+        return {
+            "success": True,
+            "results": RerankResults.from_scores(scores, documents, top_n=test_case.get("top_n")),
+            "time": elapsed,
+            "error": None
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "results": [],
+            "time": 0,
+            "error": str(e)
+        }
 
 def test_official_qwen(test_case, model_info):
     """Test real Qwen3-Reranker using Transformers"""
+    metrics.REQUESTS.inc(backend="transformers")
     try:
         query = test_case["query"]
         documents = test_case["documents"]
-        instruction = test_case.get("instruction", "Given a web search query, retrieve relevant passages that answer the query")
+        instruction = test_case.get("instruction", DEFAULT_INSTRUCTION)
         
         # Handle empty documents case
         if not documents:
@@ -131,7 +95,7 @@ def test_official_qwen(test_case, model_info):
         start_time = time.time()
         
         # Create pairs for all documents
-        pairs = [format_instruction(instruction, query, doc) for doc in documents]
+        pairs = [format_instruction(instruction, query, doc, model_info.get('template', "corrected")) for doc in documents]
         
         # Process inputs
         inputs = process_inputs(
@@ -152,23 +116,13 @@ def test_official_qwen(test_case, model_info):
         )
         
         elapsed = time.time() - start_time
+        metrics.LATENCY.observe(elapsed, backend="transformers")
+        metrics.BATCH_SIZE.observe(len(pairs), backend="transformers")
+        metrics.PAIRS.inc(len(pairs), backend="transformers")
         
-        # Create results
-        results = []
-        for idx, (doc, score) in enumerate(zip(documents, scores)):
-            results.append({
-                "index": idx,
-                "document": doc,
-                "relevance_score": score,
-                "raw_response": f"{score:.4f}"
-            })
-        
-        # Sort by score (descending)
-        results.sort(key=lambda x: x["relevance_score"], reverse=True)
-        
-        # Apply top_n if specified
-        if "top_n" in test_case:
-            results = results[:test_case["top_n"]]
+        # Rank by score (descending) and apply top_n if specified; dicts are
+        # only materialized when the results are serialized
+        results = RerankResults.from_scores(scores, documents, top_n=test_case.get("top_n"))
         
         return {
             "success": True,
@@ -178,6 +132,7 @@ def test_official_qwen(test_case, model_info):
         }
         
     except Exception as e:
+        metrics.ERRORS.inc(backend="transformers")
         return {
             "success": False,
             "results": [],
@@ -189,13 +144,15 @@ def main():
     """Run real Qwen3-Reranker tests only"""
     print("🤖 REAL QWEN3-RERANKER TEST (Transformers)")
     print("=" * 50)
+    metrics.start_from_env()
     
-    # Load model once
-    model_info, error = load_real_model()
+    # Load the default model once; other variants load on first use
+    registry, error = load_registry()
     if error:
         print(f"❌ Failed to load model: {error}")
         return
     
+    model_info = registry.get().model_info
     print("✅ Model loaded successfully")
     print(f"🎯 Token IDs: false={model_info['token_false_id']}, true={model_info['token_true_id']}")
     
@@ -209,7 +166,7 @@ def main():
         
         # Test real implementation
         print("🤖 Testing Real Qwen3-Reranker...")
-        real_result = test_official_qwen(test_case, model_info)
+        real_result = test_official_routed(test_case, registry)
         
         results[test_case["name"]] = {
             "test_case": test_case,
@@ -238,7 +195,7 @@ def main():
     # Save results
     output_file = "results/official_results.json"
     with open(output_file, 'w') as f:
-        json.dump(results, f, indent=2)
+        json.dump(results, f, indent=2, default=json_default)
     
     print(f"\n💾 Results saved to: {output_file}")
     
@@ -252,6 +209,7 @@ def main():
     print(f"Successful Tests: {successful_tests}")
     print(f"Success Rate: {successful_tests/total_tests*100:.1f}%")
     print("✅ Real tests completed")
+    metrics.dump_from_env()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
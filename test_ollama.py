@@ -14,15 +14,22 @@ Usage:
 
 Environment Variables:
     MODEL_NAME: Override default model name (default: qwen_reranker_v2)
+    OLLAMA_HOST: Ollama host[:port] or URL, as for `ollama serve` (default: 127.0.0.1:11434)
+    OLLAMA_SHARD_SIZE: Max documents per request before sharding (default: 32, 0 disables)
+    OLLAMA_SHARD_WORKERS: Shards sent in parallel (default: 4)
+    OLLAMA_SHARD_RETRIES: Retries per failed shard (default: 2)
 """
 
 import json
 import requests
 import time
 import os
-import glob
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
+import metrics
+from corpus import load_test_cases
+
 # Load environment variables
 load_dotenv()
 
@@ -30,77 +37,156 @@ def get_model_name():
     """Get model name from environment variable or use default"""
     return os.getenv("MODEL_NAME", "qwen_reranker_v2")
 
-def load_test_cases():
-    """Load test cases from JSON files in tests/ directory"""
-    test_cases = []
-    test_files = glob.glob("tests/test_*.json")
-    
-    for test_file in sorted(test_files):
-        try:
-            with open(test_file, 'r') as f:
-                test_data = json.load(f)
-                
-            # Extract test case name from filename
-            test_name = os.path.splitext(os.path.basename(test_file))[0]
-            
-            # Create test case structure
-            test_case = {
-                "name": test_name,
-                "file": test_file,
-                "query": test_data.get("query", ""),
-                "documents": test_data.get("documents", [])
-            }
-            
-            # Add optional parameters if present
-            if "instruction" in test_data:
-                test_case["instruction"] = test_data["instruction"]
-            if "top_n" in test_data:
-                test_case["top_n"] = test_data["top_n"]
-            if "model" in test_data:
-                test_case["model"] = test_data["model"]
-            if "_test_metadata" in test_data:
-                test_case["_test_metadata"] = test_data["_test_metadata"]
-                
-            test_cases.append(test_case)
-            
-        except Exception as e:
-            print(f"⚠️  Warning: Could not load {test_file}: {e}")
-    
-    return test_cases
+def get_ollama_url():
+    """Get Ollama base URL from OLLAMA_HOST, parsed the way Ollama itself parses it
+
+    A bare host[:port] (e.g. "0.0.0.0") uses http and port 11434; an explicit
+    http:// or https:// scheme without a port uses 80 / 443.
+    """
+    host = os.getenv("OLLAMA_HOST", "").strip().rstrip("/")
+    scheme, sep, hostport = host.partition("://")
+    default_port = {"http": "80", "https": "443"}.get(scheme, "11434") if sep else "11434"
+    if not sep:
+        scheme, hostport = "http", host
+    hostname, colon, port = hostport.rpartition(":")
+    if not colon or hostport.endswith("]"):
+        hostname, port = hostport, default_port
+    return f"{scheme}://{hostname or '127.0.0.1'}:{port or default_port}"
+
+def get_shard_size():
+    """Get maximum documents per rerank request (OLLAMA_SHARD_SIZE, default: 32)"""
+    return int(os.getenv("OLLAMA_SHARD_SIZE", "32"))
+
+def get_shard_workers():
+    """Get number of shards sent in parallel (OLLAMA_SHARD_WORKERS, default: 4)"""
+    return int(os.getenv("OLLAMA_SHARD_WORKERS", "4"))
+
+def get_shard_retries():
+    """Get retries per failed shard (OLLAMA_SHARD_RETRIES, default: 2)"""
+    return int(os.getenv("OLLAMA_SHARD_RETRIES", "2"))
+
+def _is_retryable(error):
+    """Client errors (4xx, e.g. unknown model) are not worth retrying"""
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status is None or status >= 500
+
+def _remaining(deadline, timeout):
+    """Per-attempt timeout: timeout, capped by the time left before an absolute monotonic deadline"""
+    if deadline is None:
+        return timeout
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise TimeoutError("deadline expired")
+    return min(timeout, remaining)
 
-def test_ollama_reranker(test_case):
-    """Test Ollama reranking API"""
-    url = "http://localhost:11434/api/rerank"
+def _rerank_shard(url, payload, offset, retries, timeout, deadline=None):
+    """Send one shard, retrying it on its own, and re-map indices to global positions
+
+    With a deadline (absolute time.monotonic() value), each attempt and backoff
+    only gets the time that is left, and no attempt starts after it passes.
+    """
+    attempt = 0
+    metrics.QUEUE_DEPTH.inc(queue="ollama_shards")
+    try:
+        while True:
+            try:
+                response = requests.post(url, json=payload, timeout=_remaining(deadline, timeout))
+                response.raise_for_status()
+                results = response.json().get("results", [])
+                break
+            except Exception as e:
+                if attempt >= retries or not _is_retryable(e) or isinstance(e, TimeoutError):
+                    raise
+                backoff = 0.1 * (2 ** attempt)
+                if deadline is not None and time.monotonic() + backoff >= deadline:
+                    raise
+                time.sleep(backoff)
+                attempt += 1
+    finally:
+        metrics.QUEUE_DEPTH.dec(queue="ollama_shards")
+    metrics.BATCH_SIZE.observe(len(payload["documents"]), backend="ollama")
+
+    for local_idx, result in enumerate(results):
+        result["index"] = result.get("index", local_idx) + offset
+    return results
+
+def test_ollama_reranker(test_case, shard_size=None, max_workers=None, retries=None, timeout=10, deadline=None):
+    """Test Ollama reranking API
+
+    Document lists longer than shard_size are split into shards that are sent
+    in parallel. Shard-local indices are re-mapped to global positions and
+    top_n is applied after merging. Each failed shard is retried on its own;
+    unsharded requests are sent once, without retries.
+
+    timeout applies to each HTTP attempt. deadline (an absolute time.monotonic()
+    value) bounds the whole request, including retries and queued shards.
+    """
+    url = f"{get_ollama_url()}/api/rerank"
+    if shard_size is None:
+        shard_size = get_shard_size()
+    if max_workers is None:
+        max_workers = get_shard_workers()
+    if retries is None:
+        retries = get_shard_retries()
     
     # Use model from test case if specified, otherwise use from .env
     model_name = test_case.get("model", get_model_name())
+    documents = test_case["documents"]
     
     payload = {
         "model": model_name,
         "query": test_case["query"],
-        "documents": test_case["documents"]
+        "documents": documents
     }
     
     # Add optional parameters
     if "instruction" in test_case:
         payload["instruction"] = test_case["instruction"]
-    if "top_n" in test_case:
-        payload["top_n"] = test_case["top_n"]
     
+    metrics.REQUESTS.inc(backend="ollama")
     start_time = time.time()
     try:
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-        result = response.json()
+        if shard_size <= 0 or len(documents) <= shard_size:
+            # Small enough for a single request; let the server apply top_n.
+            # Retries are only for shards, so a single request behaves as before.
+            if "top_n" in test_case:
+                payload["top_n"] = test_case["top_n"]
+            results = _rerank_shard(url, payload, 0, 0, timeout, deadline)
+        else:
+            offsets = range(0, len(documents), shard_size)
+            shard_payloads = [dict(payload, documents=documents[offset:offset + shard_size]) for offset in offsets]
+            
+            workers = max(1, min(max_workers, len(shard_payloads)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_rerank_shard, url, shard_payload, offset, retries, timeout, deadline)
+                    for shard_payload, offset in zip(shard_payloads, offsets)
+                ]
+                results = []
+                for shard_number, future in enumerate(futures):
+                    try:
+                        results.extend(future.result())
+                    except Exception as e:
+                        raise RuntimeError(f"shard {shard_number + 1}/{len(futures)} failed: {e}") from e
+            
+            # Merge partial rankings, then apply top_n globally
+            results.sort(key=lambda r: r["relevance_score"], reverse=True)
+            if "top_n" in test_case:
+                results = results[:test_case["top_n"]]
+        
         elapsed = time.time() - start_time
+        metrics.LATENCY.observe(elapsed, backend="ollama")
+        metrics.PAIRS.inc(len(documents), backend="ollama")
         
         return {
             "success": True,
-            "results": result.get("results", []),
+            "results": results,
             "time": elapsed,
             "error": None
         }
     except Exception as e:
+        metrics.ERRORS.inc(backend="ollama")
         return {
             "success": False,
             "results": [],
@@ -108,13 +194,23 @@ def test_ollama_reranker(test_case):
             "error": str(e)
         }
 
+def is_test_passed(test_case, result):
+    """Determine if a test passed, honouring _test_metadata.expected_to_fail"""
+    expected_to_fail = test_case.get("_test_metadata", {}).get("expected_to_fail", False)
+    if expected_to_fail:
+        # For expected failures, success means it actually failed
+        return not result["success"]
+    # For normal tests, success means it actually succeeded
+    return result["success"]
+
 def main():
     """Run Ollama tests only"""
     print("🧪 Ollama Qwen3-Reranker Test")
     print("=" * 40)
+    metrics.start_from_env()
     
     results = {}
-    test_cases = load_test_cases()
+    test_cases = list(load_test_cases())
     
     for test_case in test_cases:
         print(f"\n📋 Testing: {test_case['name']}")
@@ -127,16 +223,10 @@ def main():
         
         # Check if this test is expected to fail
         expected_to_fail = test_case.get("_test_metadata", {}).get("expected_to_fail", False)
-        
-        # Determine if test passed based on expectations
-        test_passed = False
+        test_passed = is_test_passed(test_case, ollama_result)
         if expected_to_fail:
-            # For expected failures, success means it actually failed
-            test_passed = not ollama_result['success']
             status = "SUCCESS (Expected Failure)" if test_passed else "FAILED (Should Have Failed)"
         else:
-            # For normal tests, success means it actually succeeded
-            test_passed = ollama_result['success']
             status = "SUCCESS" if test_passed else "FAILED"
 
         results[test_case["name"]] = {
@@ -180,6 +270,7 @@ def main():
     print(f"Total Tests: {total_tests}")
     print(f"Successful Tests: {successful_tests}")
     print(f"Success Rate: {successful_tests/total_tests*100:.1f}%")
+    metrics.dump_from_env()
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
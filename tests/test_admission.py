@@ -0,0 +1,68 @@
+"""Unit tests for admission.AdmissionController"""
+
+import pytest
+
+from admission import AdmissionController, OverloadedError, deadline_in
+
+DOCUMENTS = ["a short document about reranking"] * 8
+
+
+def _try_admit(controller, seconds):
+    """Run one request that takes `seconds`, returning its ladder step name or None if shed"""
+    try:
+        with controller.admit(DOCUMENTS, deadline_in(0.5)) as step:
+            tokens = controller.effective_tokens([len(doc) // 4 + 1 for doc in DOCUMENTS], step)
+            controller.observe(seconds, tokens)
+            return step["name"]
+    except OverloadedError:
+        return None
+
+
+def test_recovers_after_slow_cold_start():
+    controller = AdmissionController()
+    controller.observe(10.0, 1000)
+
+    outcomes = [_try_admit(controller, 0.01) for _ in range(100)]
+    first_admitted = next(i for i, name in enumerate(outcomes) if name is not None)
+
+    assert first_admitted > 0
+    assert all(name == "full" for name in outcomes[first_admitted + 1:])
+
+
+def test_recovers_from_pessimistic_initial_estimate():
+    controller = AdmissionController(initial_seconds_per_token=1.0)
+
+    outcomes = [_try_admit(controller, 0.01) for _ in range(200)]
+
+    assert outcomes[-1] == "full"
+
+
+def test_still_sheds_most_requests_on_a_slow_host():
+    controller = AdmissionController()
+    controller.observe(10.0, 1000)
+
+    outcomes = [_try_admit(controller, 10.0) for _ in range(100)]
+
+    admitted = sum(name is not None for name in outcomes)
+    assert 0 < admitted <= 20
+
+
+def test_rate_decay_stops_at_floor():
+    controller = AdmissionController(initial_seconds_per_token=1.0, min_seconds_per_token=1e-3)
+
+    for _ in range(500):
+        try:
+            with controller.admit(DOCUMENTS, deadline_in(0.0)):
+                pass
+        except OverloadedError:
+            pass
+
+    assert controller.seconds_per_token == 1e-3
+
+
+def test_sheds_when_queue_is_full():
+    controller = AdmissionController(max_queue=0)
+
+    with pytest.raises(OverloadedError, match="admission queue full"):
+        with controller.admit(DOCUMENTS):
+            pass
@@ -0,0 +1,41 @@
+"""Unit tests for the corpus index cache"""
+
+import json
+import os
+
+import corpus
+
+
+def _write(path, text):
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _build(root):
+    return [entry["name"] for entry in corpus.build_index(str(root))]
+
+
+def test_empty_and_broken_sources_stay_cached(tmp_path, capsys):
+    _write(tmp_path / "test_empty.jsonl", "")
+    _write(tmp_path / "test_broken.json", "{not json")
+    _write(tmp_path / "test_ok.json", json.dumps({"query": "q", "documents": ["d"]}))
+    index_path = tmp_path / corpus.INDEX_FILENAME
+
+    assert _build(tmp_path) == ["test_ok"]
+    assert capsys.readouterr().out.count("test_broken.json") == 1
+    written = os.stat(index_path).st_mtime_ns
+
+    assert _build(tmp_path) == ["test_ok"]
+    assert "test_broken.json" not in capsys.readouterr().out
+    assert os.stat(index_path).st_mtime_ns == written
+    assert corpus.metrics.CACHE_HIT_RATIO.value(cache="corpus_index") == 1.0
+
+
+def test_changed_source_is_rescanned(tmp_path):
+    shard = tmp_path / "test_shard.jsonl"
+    _write(shard, json.dumps({"name": "a", "query": "q", "documents": []}) + "\n")
+    assert _build(tmp_path) == ["a"]
+
+    _write(shard, "".join(json.dumps({"name": name, "query": "q", "documents": []}) + "\n" for name in "ab"))
+    assert _build(tmp_path) == ["a", "b"]
+    assert [case["name"] for case in corpus.load_test_cases(str(tmp_path))] == ["a", "b"]
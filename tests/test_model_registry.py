@@ -0,0 +1,97 @@
+"""Unit tests for model_registry.ModelRegistry with a fake backend"""
+
+import pytest
+
+from model_registry import ModelRegistry, UnknownModelError
+
+MB = 1024 * 1024
+SIZES = {"small-a": 40 * MB, "small-b": 40 * MB, "large": 60 * MB}
+
+
+class FakeTensor:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def numel(self):
+        return self.nbytes
+
+    def element_size(self):
+        return 1
+
+
+class FakeModel:
+    def __init__(self, nbytes):
+        self.nbytes = nbytes
+
+    def parameters(self):
+        return [FakeTensor(self.nbytes)]
+
+    def buffers(self):
+        return []
+
+
+def _registry(events, memory_budget_mb=100):
+    """Registry over SIZES whose loads are recorded in events"""
+
+    def backend_factory(model_id, dtype, template, max_length):
+        events.append(("load", model_id, [entry["model_id"] for entry in registry.loaded()]))
+        backend = type("FakeBackend", (), {})()
+        backend.model_info = {"model": FakeModel(SIZES[model_id])}
+        return backend
+
+    registry = ModelRegistry(specs={name: {"model_id": name} for name in SIZES},
+                             memory_budget_mb=memory_budget_mb, default_model="small-a",
+                             backend_factory=backend_factory,
+                             size_estimator=lambda model_id, dtype: SIZES[model_id])
+    return registry
+
+
+def _loaded(registry):
+    return [entry["model_id"] for entry in registry.loaded()]
+
+
+def test_evicts_least_recently_used():
+    events = []
+    registry = _registry(events)
+    registry.get("small-a")
+    registry.get("small-b")
+    registry.get("small-a")
+
+    registry.get("large")
+
+    assert _loaded(registry) == ["small-a", "large"]
+    assert registry.resident_bytes() <= 100 * MB
+
+
+def test_hits_do_not_reload():
+    events = []
+    registry = _registry(events)
+    first = registry.get()
+
+    assert registry.get("small-a") is first
+    assert len(events) == 1
+
+
+def test_evicts_before_loading():
+    events = []
+    registry = _registry(events)
+    registry.get("small-a")
+    registry.get("small-b")
+
+    registry.get("large")
+
+    # small-a was evicted before the large model was built, not after
+    assert events[-1] == ("load", "large", ["small-b"])
+    assert _loaded(registry) == ["small-b", "large"]
+
+
+def test_unknown_model_leaves_loaded_models_alone():
+    events = []
+    registry = _registry(events, memory_budget_mb=50)
+    registry.get("small-a")
+
+    with pytest.raises(UnknownModelError):
+        registry.get("missing")
+
+    assert _loaded(registry) == ["small-a"]
+    assert len(events) == 1
@@ -0,0 +1,73 @@
+"""Unit tests for the sharded Ollama client, run against mock_ollama.py"""
+
+import pytest
+
+import mock_ollama
+import test_ollama
+
+QUERY = "what is machine learning"
+DOCUMENTS = [f"document {i} about machine learning and topic {i % 3}" for i in range(10)]
+
+
+@pytest.fixture
+def mock_server(monkeypatch):
+    servers = []
+
+    def start(**options):
+        server, url = mock_ollama.start_in_background(port=0, **options)
+        servers.append(server)
+        monkeypatch.setenv("OLLAMA_HOST", url)
+        return server.state
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _rerank(test_case, **options):
+    case = {"model": "qwen_reranker_v2", "query": QUERY, "documents": DOCUMENTS}
+    case.update(test_case)
+    return test_ollama.test_ollama_reranker(case, **options)
+
+
+def test_shard_indices_map_back_to_documents(mock_server):
+    mock_server()
+
+    result = _rerank({}, shard_size=3, max_workers=2)
+
+    assert result["success"], result["error"]
+    assert sorted(r["index"] for r in result["results"]) == list(range(len(DOCUMENTS)))
+    for r in result["results"]:
+        assert r["document"] == DOCUMENTS[r["index"]]
+
+
+def test_top_n_is_applied_after_merging(mock_server):
+    mock_server()
+
+    result = _rerank({"top_n": 4}, shard_size=3)
+
+    expected = sorted(range(len(DOCUMENTS)), reverse=True,
+                      key=lambda i: mock_ollama.deterministic_score(QUERY, DOCUMENTS[i], ""))[:4]
+    assert [r["index"] for r in result["results"]] == expected
+    assert result["results"] == _rerank({"top_n": 4}, shard_size=0)["results"]
+
+
+def test_failed_shards_are_retried(mock_server):
+    state = mock_server(error_rate=0.3, seed=1)
+
+    result = _rerank({}, shard_size=2, retries=10)
+
+    assert result["success"], result["error"]
+    assert state.stats["errors"] > 0
+    assert state.stats["requests"] == 5 + state.stats["errors"]
+
+
+def test_client_errors_are_not_retried(mock_server):
+    state = mock_server()
+
+    result = _rerank({"model": "missing_model"}, shard_size=4, retries=3)
+
+    assert not result["success"]
+    assert "404" in result["error"]
+    assert state.stats["requests"] == 3
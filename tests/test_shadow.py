@@ -0,0 +1,52 @@
+"""Unit tests for shadow.ShadowScorer"""
+
+import numpy as np
+
+from rerank_result import RerankResults
+from shadow import ShadowScorer
+
+DOCUMENTS = ["a", "b"]
+
+
+class FakeBackend:
+    """Scores in a fixed order; the first call returns a malformed score array"""
+
+    name = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    def score(self, query, documents, instruction=None):
+        self.calls += 1
+        if self.calls == 1:
+            return np.zeros(len(documents) + 1, dtype=np.float32)
+        return np.array([0.9, 0.1], dtype=np.float32)
+
+
+def _submit(scorer):
+    primary = RerankResults.from_scores(np.array([0.8, 0.2], dtype=np.float32), DOCUMENTS)
+    return scorer.submit("query", DOCUMENTS, None, primary, 0.01)
+
+
+def test_worker_survives_failed_comparison():
+    scorer = ShadowScorer(FakeBackend(), sample_rate=1.0)
+    try:
+        for _ in range(3):
+            assert _submit(scorer)
+        scorer.drain()
+        report = scorer.report()
+    finally:
+        scorer.close()
+
+    assert report["counts"]["error"] == 1
+    assert report["counts"]["compared"] == 2
+    assert report["ranking_match_ratio"] == 1.0
+
+
+def test_sample_rate_zero_skips_requests():
+    scorer = ShadowScorer(FakeBackend(), sample_rate=0.0)
+    try:
+        assert not _submit(scorer)
+    finally:
+        scorer.close()
+    assert scorer.report()["counts"]["sampled"] == 0